@@ -0,0 +1,152 @@
+""" Columnar reader of BED files (chrom, start, end, name, score and strand).
+Intervals are read in chunks by the C parser of pandas and collected into
+NumPy columns of each chromosome.
+"""
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable, Iterator, Union
+
+from .compression import open_input
+
+BED_COLUMNS = ('chrom', 'start', 'end', 'name', 'score', 'strand')
+
+# Fixed categories so that codes of strand are the same in all chunks
+STRAND_DTYPE = pd.CategoricalDtype(['+', '-', '.'])
+
+BED_DTYPES = {
+    'chrom': 'category',
+    'start': np.int64,
+    'end': np.int64,
+    'name': object,
+    # Float because a missing score is written as '.'
+    'score': np.float64,
+    'strand': STRAND_DTYPE,
+}
+
+# The number of lines read at once
+BED_CHUNK_SIZE = 2 ** 20
+
+# Starts of header lines before intervals (UCSC track and browser lines)
+HEADER_PREFIXES = (b'#', b'track', b'browser')
+
+def iter_bed(
+        bed_path    : str,
+        usecols     : Iterable[str] = BED_COLUMNS,
+        chunksize   : int = BED_CHUNK_SIZE
+        ) -> Iterator[pd.DataFrame]:
+    """Read a BED file in chunks.
+
+    Lines starting with '#', 'track' or 'browser' before intervals are
+    skipped. Columns after the sixth one are ignored. Compressed files
+    (gzip, BGZF and Zstandard) are decompressed while being read.
+
+    Parameters
+    ----------
+    bed_path: str
+        Path to a BED file.
+    usecols: Iterable[str], optional (default: BED_COLUMNS)
+        Columns to be read. Other columns are skipped by the parser. A file
+        with only 3 columns (BED3) is read with ('chrom', 'start', 'end').
+    chunksize: int, optional (default: BED_CHUNK_SIZE)
+        The number of lines in a chunk.
+
+    Return
+    ------
+    Iterator[pd.DataFrame]
+        DataFrame of each chunk with dtypes of BED_DTYPES. Categories of chrom
+        may be different among chunks.
+    """
+    usecols = [column for column in BED_COLUMNS if column in set(usecols)]
+    positions = [BED_COLUMNS.index(column) for column in usecols]
+    names = dict(zip(positions, usecols))
+
+    header_num = _count_header_lines(bed_path)
+
+    with open_input(bed_path) as f:
+        reader = pd.read_csv(
+            f, sep='\t', header=None, skiprows=header_num, usecols=positions,
+            dtype={i: BED_DTYPES[column] for i, column in names.items()},
+            na_values={i: ['.'] for i, column in names.items()
+                       if column == 'score'},
+            keep_default_na=False, chunksize=chunksize)
+
+        for chunk in reader:
+            yield chunk.rename(columns=names)
+
+def _count_header_lines(bed_path: str) -> int:
+    """Returns the number of lines before intervals, which start with one of
+    HEADER_PREFIXES or are empty.
+    """
+    header_num = 0
+    with open_input(bed_path) as f:
+        for line in f:
+            if line.strip() and not line.startswith(HEADER_PREFIXES):
+                break
+            header_num += 1
+    return header_num
+
+def read_bed(
+        bed_path    : str,
+        usecols     : Iterable[str] = BED_COLUMNS,
+        chunksize   : int = BED_CHUNK_SIZE
+        ) -> Dict[str, Dict[str, Union[np.ndarray, pd.Categorical]]]:
+    """Read a BED file into NumPy columns of each chromosome.
+
+    Parameters
+    ----------
+    bed_path: str
+        Path to a BED file.
+    usecols: Iterable[str], optional (default: BED_COLUMNS)
+        Columns to be read. chrom is always read.
+    chunksize: int, optional (default: BED_CHUNK_SIZE)
+        The number of lines parsed at once. Memory is used only for the
+        columns and one chunk.
+
+    Return
+    ------
+    Dict[str, Dict[str, Union[np.ndarray, pd.Categorical]]]
+        Dictionary of columns (except chrom) of each chromosome in the order
+        of first appearance. start and end are int64 arrays, name is an
+        object array, score is a float64 array and strand is pd.Categorical.
+        Lines of a chromosome are in the original order.
+    """
+    usecols = set(usecols) | {'chrom'}
+    # Lists of arrays of each chromosome and column
+    parts = {}
+
+    for chunk in iter_bed(bed_path, usecols, chunksize):
+        chrom = chunk['chrom'].cat
+        codes = chrom.codes.to_numpy()
+        # Group lines by chromosome keeping the original order
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(
+            codes[order], np.arange(len(chrom.categories) + 1))
+
+        columns = {}
+        for column in chunk.columns.drop('chrom'):
+            if column == 'strand':
+                values = chunk[column].cat.codes.to_numpy()
+            else:
+                values = chunk[column].to_numpy()
+            columns[column] = values[order]
+
+        # Categories are sorted, so keep chromosomes in the order of lines
+        first_lines = order[bounds[:-1][bounds[:-1] < bounds[1:]]]
+        for code in codes[np.sort(first_lines)]:
+            chrom_parts = parts.setdefault(chrom.categories[code], {})
+            start, end = bounds[code], bounds[code + 1]
+            for column, values in columns.items():
+                chrom_parts.setdefault(column, []).append(values[start:end])
+
+    beds = {}
+    for chrom_name, chrom_parts in parts.items():
+        beds[chrom_name] = {}
+        for column, arrays in chrom_parts.items():
+            values = np.concatenate(arrays)
+            if column == 'strand':
+                values = pd.Categorical.from_codes(values, dtype=STRAND_DTYPE)
+            beds[chrom_name][column] = values
+
+    return beds
@@ -0,0 +1,231 @@
+""" Benchmarks of the readers in parse module on synthetic files.
+
+Synthetic files (1D list, multi-FASTA with short or long records, and 2D list
+heavy with comments and headers) are generated in a data directory once and
+reused. Each reader configuration runs in a fresh process, and throughput
+(lines/s and MB/s) and peak RSS are written as JSON lines so that results of
+different runs can be compared.
+
+Usage
+-----
+python -m nothingspecial.bench --data-dir /tmp/ns_bench --sizes 10M 1G \\
+    --output bench_output.txt
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import Dict, List, Any
+
+from . import __version__
+from . import parse
+
+# Units accepted in --sizes
+SIZE_UNITS = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30}
+
+# Reader configurations run on each dataset type
+CONFIGS = {
+    '1D': [
+        ('read_1D_list', {}),
+        ('read_1D_list', {'dtype': 'int64'}),
+    ],
+    '2D': [
+        ('read_2D_list', {}),
+        ('read_2D_list', {'join_value_lines': True}),
+        ('read_2D_list', {'read_values': False}),
+        ('read_2D_list', {'include_key_order': True}),
+        ('iter_2D_list', {'join_value_lines': True}),
+    ],
+}
+
+# Dataset types: (list type, generator name, generator options)
+DATASETS = {
+    '1D_numbers':       ('1D', 'gen_1D_list', {}),
+    'fasta_short':      ('2D', 'gen_multi_fasta', {'record_len': 300}),
+    'fasta_long':       ('2D', 'gen_multi_fasta', {'record_len': 1000000}),
+    '2D_commented':     ('2D', 'gen_multi_fasta', {
+                            'record_len': 500, 'comment_ratio': 0.3,
+                            'header_lines': 1000}),
+}
+
+# =============== Synthetic Data Generators =============== #
+
+def gen_1D_list(file_path: str, size: int, seed: int = 0) -> int:
+    """Writes a 1D list of integers of about size bytes and returns the number
+    of lines.
+    """
+    rng = random.Random(seed)
+    # Pre-generated pool of lines makes generation of GB files fast
+    pool = [f'{rng.randrange(10 ** 9)}\n' for _ in range(10000)]
+    chunk = ''.join(pool)
+    repeat = max(size // len(chunk), 1)
+
+    with open(file_path, 'w') as f:
+        print(f'itemnum: {repeat * len(pool)}', file=f)
+        for _ in range(repeat):
+            f.write(chunk)
+
+    return repeat * len(pool) + 1
+
+def gen_multi_fasta(
+        file_path: str,
+        size: int,
+        record_len: int = 300,
+        line_width: int = 60,
+        comment_ratio: float = 0.0,
+        header_lines: int = 0,
+        seed: int = 0
+        ) -> int:
+    """Writes a multi-FASTA file of about size bytes and returns the number of
+    lines. comment_ratio is the number of comment lines per sequence line.
+    """
+    rng = random.Random(seed)
+    pool = ''.join(rng.choice('TCAG') for _ in range(2 ** 16))
+    line_count = 0
+
+    with open(file_path, 'w') as f:
+        for n in range(header_lines):
+            f.write(f'header line {n}\n')
+        line_count += header_lines
+
+        written = 0
+        key_id = 0
+        while written < size:
+            lines = [f'>seq{key_id}']
+            for start in range(0, record_len, line_width):
+                offset = rng.randrange(len(pool) - line_width)
+                width = min(line_width, record_len - start)
+                lines.append(pool[offset:offset + width])
+                if comment_ratio > 0 and rng.random() < comment_ratio:
+                    lines.append('# comment line')
+
+            record = '\n'.join(lines) + '\n'
+            f.write(record)
+            written += len(record)
+            line_count += len(lines)
+            key_id += 1
+
+    return line_count
+
+def prepare_dataset(data_dir: str, name: str, size: int) -> Dict[str, Any]:
+    """Generates a dataset if it does not exist and returns its metadata. """
+    file_path = os.path.join(data_dir, f'{name}_{size}.txt')
+    meta_path = file_path + '.json'
+
+    if os.path.isfile(file_path) and os.path.isfile(meta_path):
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+
+    list_type, generator, options = DATASETS[name]
+    line_count = globals()[generator](file_path, size, **options)
+    meta = {
+        'dataset': name,
+        'list_type': list_type,
+        'path': file_path,
+        'bytes': os.path.getsize(file_path),
+        'lines': line_count,
+        'skip_headers': options.get('header_lines', 0),
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return meta
+
+# =============== Measurement =============== #
+
+def run_case(meta: Dict[str, Any], reader: str, options: Dict[str, Any]
+        ) -> Dict[str, Any]:
+    """Runs one reader configuration in a fresh process and returns a result
+    record.
+    """
+    # A new process for each case so that peak RSS is not shared
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        result = executor.submit(_measure, meta, reader, options).result()
+
+    seconds = result['seconds']
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'version': __version__,
+        'python': platform.python_version(),
+        'dataset': meta['dataset'],
+        'bytes': meta['bytes'],
+        'lines': meta['lines'],
+        'reader': reader,
+        'options': options,
+        'seconds': seconds,
+        'lines_per_s': meta['lines'] / seconds,
+        'mb_per_s': meta['bytes'] / 2 ** 20 / seconds,
+        'baseline_rss_mb': result['baseline_rss_mb'],
+        'peak_rss_mb': result['peak_rss_mb'],
+    }
+
+def _measure(meta, reader, options):
+    """Target of a benchmark process. """
+    baseline = _peak_rss_mb()
+    kwargs = dict(options, skip_headers=meta['skip_headers'])
+
+    start = time.perf_counter()
+    if reader == 'iter_2D_list':
+        # Consume items one by one as a streaming pipeline does
+        for _ in parse.iter_2D_list(meta['path'], **kwargs):
+            pass
+    else:
+        getattr(parse, reader)(meta['path'], **kwargs)
+    seconds = time.perf_counter() - start
+
+    return {'seconds': seconds, 'baseline_rss_mb': baseline,
+            'peak_rss_mb': _peak_rss_mb()}
+
+def _peak_rss_mb():
+    """Returns peak resident set size of this process in MB. """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    if sys.platform == 'darwin':
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+def parse_size(size: str) -> int:
+    """Converts a size string such as '10M' or '2G' to bytes. """
+    unit = size[-1].upper()
+    if unit in SIZE_UNITS:
+        return int(float(size[:-1]) * SIZE_UNITS[unit])
+    return int(size)
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--data-dir', required=True,
+                        help='Directory of synthetic files.')
+    parser.add_argument('--sizes', nargs='+', default=['10M'],
+                        help='File sizes (e.g., 10M 1G).')
+    parser.add_argument('--datasets', nargs='+', default=list(DATASETS),
+                        choices=list(DATASETS))
+    parser.add_argument('--output', default='',
+                        help='File to which JSON lines are appended. '
+                             'Standard output if not given.')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    out = open(args.output, 'a') if args.output else sys.stdout
+
+    try:
+        for size in map(parse_size, args.sizes):
+            for name in args.datasets:
+                meta = prepare_dataset(args.data_dir, name, size)
+                for reader, options in CONFIGS[meta['list_type']]:
+                    record = run_case(meta, reader, options)
+                    print(json.dumps(record), file=out, flush=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+""" On-disk cache of parsed files. A parsed result is stored in a binary
+sidecar file keyed by the path, size and modification time of the input file
+and the parsing arguments, so repeated parsing of the same file is replaced by
+loading the stored result.
+
+A result is stored by text.write_big_pickle, so large buffers (e.g., NumPy
+arrays) are loaded by mmap without copying.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+
+from typing import Any, Callable, Iterable, List, Tuple
+
+from .text import do_nothing, read_big_pickle, write_big_pickle
+
+CACHE_SUFFIX = '.cache'
+
+# Version of the cache key. Increment when parsed results change.
+CACHE_VERSION = 2
+
+class ParseCache:
+    """Represents a directory of cached parse results.
+
+    Arguments of a parser are part of the cache key. Strings, numbers, None,
+    lists, tuples, sets and dictionaries of them are converted to the key as
+    they are. Functions (e.g., apply_func) and other objects cannot be
+    converted, so a user must give cache_key which identifies them (for
+    example, 'int-v1'). Default text.do_nothing does not need cache_key.
+    Change cache_key whenever the functions change.
+
+    How-to-use
+    ----------
+    cache = ParseCache('/path/to/cache_dir', max_bytes=50 * 2 ** 30)
+    items = parse.read_2D_list(path, join_value_lines=True, cache=cache)
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 10 * 2 ** 30) -> None:
+        """Creates ParseCache instance. cache_dir is created if it does not
+        exist. Least recently used entries are removed when the total size of
+        entries exceeds max_bytes.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def load(self,
+            parser:         Callable[..., Any],
+            file_path:      str,
+            cache_key:      str = '',
+            key_exclude:    Iterable[str] = (),
+            **kwargs
+            ) -> Any:
+        """Returns the result of parser(file_path, **kwargs) from the cache,
+        or calls parser and stores its result if the cache does not have it.
+        Arguments named in key_exclude are not a part of the cache key
+        because they do not change the result (e.g., the number of processes).
+        """
+        key_kwargs = {k: v for k, v in kwargs.items() if k not in key_exclude}
+        entry_path = self.entry_path(parser, file_path, cache_key, key_kwargs)
+
+        if os.path.isfile(entry_path):
+            result = read_big_pickle(entry_path)
+            # Mark as recently used
+            os.utime(entry_path)
+            return result
+
+        result = parser(file_path, **kwargs)
+        self._store(entry_path, result)
+        return result
+
+    def entry_path(self,
+            parser:     Callable[..., Any],
+            file_path:  str,
+            cache_key:  str,
+            kwargs:     dict
+            ) -> str:
+        """Returns a path to the cache entry of given arguments. """
+        stat = os.stat(file_path)
+        key = {
+            'version': CACHE_VERSION,
+            'parser': f'{parser.__module__}.{parser.__qualname__}',
+            'path': os.path.abspath(file_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'cache_key': cache_key,
+            'kwargs': {k: _key_value(k, v, cache_key)
+                       for k, v in sorted(kwargs.items())},
+        }
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest + CACHE_SUFFIX)
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """Returns a list of (path, size, last used time) of cache entries in
+        the order of last used time.
+        """
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the total size is not
+        larger than max_bytes.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Removes all cache entries. """
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+    def _store(self, entry_path, result):
+        # Write to a temporary file first so that other processes never read
+        # an incomplete entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            write_big_pickle(result, tmp_path)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+def _key_value(name, value, cache_key):
+    """Converts an argument value to a JSON-compatible value for a cache key.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_key_value(name, v, cache_key) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_key_value(name, v, cache_key) for v in value)
+    if isinstance(value, dict):
+        return {str(k): _key_value(name, v, cache_key)
+                for k, v in value.items()}
+    if value is do_nothing:
+        return 'do_nothing'
+    if isinstance(value, np.dtype):
+        return str(value)
+    if isinstance(value, type) and value.__module__ in ('builtins', 'numpy'):
+        # Built-in or NumPy types such as int or numpy.int64
+        return f'{value.__module__}.{value.__qualname__}'
+
+    if cache_key == '':
+        raise ValueError(
+            f'Argument {name} cannot be used as a cache key. Please give '
+            'cache_key that identifies it.')
+    # Identified by cache_key
+    return f'<{type(value).__name__}>'
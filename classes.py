@@ -1,5 +1,4 @@
 
-import re
 import pickle
 import pandas as pd
 
@@ -7,6 +6,7 @@ from collections.abc import Mapping
 from typing import List, Union, Dict
 
 from . import num
+from . import text
 
 class BinaryCategoryHandler:
     """Represents a set of categories (questions/tests) of which answers can 
@@ -286,14 +286,27 @@ class MutationCompSet(object):
         return str(self.comp_dict)
 
 class GeneticCode(object):
+    # Columns looked up by hash indexes
+    INDEX_COLUMNS = ('aa1', 'aa3', 'aadig', 'codon', 'coddig')
+
     def __init__(self, csv_path, description=''):
         self.csv_path = csv_path
-        self.table = pd.read_csv(csv_path)
+        self.db = Database(pd.read_csv(csv_path), description)
         self.description = description
+        for column in self.INDEX_COLUMNS:
+            if column in self.table.columns:
+                self.db.create_index(column)
+
+    @property
+    def table(self):
+        return self.db.df
+
+    @table.setter
+    def table(self, df):
+        self.db.df = df
 
     def aadig(self, **kwargs):
-        tmp_df = num.search_items_df(self.table, **kwargs)\
-                    .loc[:, ['aa1', 'aa3', 'aadig']]
+        tmp_df = self.db.filter(**kwargs).loc[:, ['aa1', 'aa3', 'aadig']]
         tmp_df.drop_duplicates(inplace=True)
 
         if len(tmp_df.index) != 1:
@@ -302,19 +315,19 @@ class GeneticCode(object):
         return tmp_df.iloc[0]['aadig']
 
     def aa1(self, dig):
-        return num.search_items_df(self.table, aadig=dig).iloc[0]['aa1']
+        return self.db.filter(aadig=dig).iloc[0]['aa1']
 
     def aa3(self, dig):
-        return num.search_items_df(self.table, aadig=dig).iloc[0]['aa3']
+        return self.db.filter(aadig=dig).iloc[0]['aa3']
 
     def codon(self, dig):
-        return num.search_items_df(self.table, coddig=dig).iloc[0]['codon']
+        return self.db.filter(coddig=dig).iloc[0]['codon']
 
     def codons(self, **kwargs):
-        return num.search_items_df(self.table, **kwargs)['codon'].tolist()
+        return self.db.filter(**kwargs)['codon'].tolist()
 
     def filter_table(self, **kwargs):
-        return num.search_items_df(self.table, **kwargs)
+        return self.db.filter(**kwargs)
 
     def get_2f_mutation(self, cod_type, out='key', **kwargs):
         # filter table by codon type (2f20cD, 2f10, ...)
@@ -338,9 +351,55 @@ class GeneticCode(object):
 class Database(Mapping):
     """ This class inherits Mapping class. __iter__, __getitem__ and __len__ 
     functions are overwritten. """
-    def __init__(self, df, description=''):
+    def __init__(self, df, description='', indexes=None):
+        '''
+        indexes is a dictionary of index types ('hash' for "==" conditions 
+        and 'sorted' for comparisons) of columns used by filter (see 
+        create_index).
+        '''
+        self._index_types = {}
         self.df = df
         self.description = description
+        for column, index_type in (indexes or {}).items():
+            self.create_index(column, index_type)
+
+    @property
+    def df(self):
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        # Indexes are built again for a new DataFrame
+        self._df = df
+        self._indexes = {}
+
+    def create_index(self, column, index_type='hash'):
+        '''
+        Adds an index of a column used by filter. A 'hash' index finds rows 
+        of "==" conditions in O(1) and a 'sorted' index finds rows of "==" 
+        and comparisons in O(log n). The index is built at the next filter 
+        and whenever df is replaced. Please replace df (or call create_index 
+        again) after modifying df in place.
+        '''
+        if index_type not in num.INDEX_TYPES:
+            raise ValueError(f'Unknown index type: {index_type}')
+        if column not in self.df.columns:
+            raise KeyError(f'Column not found: {column}')
+        self._index_types[column] = index_type
+        self._indexes.pop(column, None)
+
+    def drop_index(self, column):
+        self._index_types.pop(column)
+        self._indexes.pop(column, None)
+
+    @property
+    def indexes(self):
+        '''Dictionary of indexes of columns (built if not yet). '''
+        for column, index_type in self._index_types.items():
+            if column not in self._indexes:
+                self._indexes[column] = num.INDEX_TYPES[index_type](
+                    self._df[column])
+        return self._indexes
         
     def filter(self, sort_by='', ascending=True, **kwargs):
         '''
@@ -365,61 +424,19 @@ class Database(Mapping):
                 "c/" for "contains"
                 "" for "=="
                 If you pass tuple to value, this function search and filter 
-                items recursively.
+                items recursively. If you pass list to value, rows matching 
+                any of the items are returned ("or") once in the original 
+                order of rows. Before num.compile_query, rows of each item 
+                were concatenated, so rows matching several items were 
+                repeated.
+                Conditions are compiled by num.compile_query.
         Dependencies
         ------------
             pandas
-            re
         '''
-        res_df = self.df
-        def f(res_df, k, v):
-            if isinstance(v, str):
-                if v == '*':
-                    pass
-                elif re.search('^gt\d+', v):
-                    v = float(re.search('^gt(\d+\.*\d*)$', v).group(1))
-                    res_df = res_df[res_df[k] > v]
-                elif re.search('^gte\d+', v):
-                    v = float(re.search('^gte(\d+\.*\d*)$', v).group(1))
-                    res_df = res_df[res_df[k] >= v]
-                elif re.search('^lt\d+', v):
-                    v = float(re.search('^lt(\d+\.*\d*)$', v).group(1))
-                    res_df = res_df[res_df[k] < v]
-                elif re.search('^lte\d+', v):
-                    v = float(re.search('lte(\d+\.*\d*)$', v).group(1))
-                    res_df = res_df[res_df[k] <= v]
-                elif re.search('^ne\d+', v):
-                    v = float(re.search('ne(\d+\.*\d*)$', v).group(1))
-                    res_df = res_df[res_df[k] != v]
-                elif re.search('^c\/', v):
-                    v = re.search('^c\/(.+)\/$', v).group(1)
-                    res_df = res_df[res_df[k].str.contains(v)]
-                elif re.search('^nc\/', v):
-                    v = re.search('^nc\/(.+)\/$', v).group(1)
-                    res_df = res_df[~res_df[k].str.contains(v)]
-                else:
-                    res_df = res_df[res_df[k] == v]
-            else:
-                res_df = res_df[res_df[k] == v]
-            return res_df
-
-        for k,v in kwargs.items():
-            if isinstance(v, list): # "or"
-                res_df_list = []
-                for i in v:
-                    res_df_list.append(f(res_df, k, i))
-                res_df = pd.concat(res_df_list)
-            if isinstance(v, tuple): # "and"
-                res_df_list = []
-                for i in v:
-                    tmp_res_df = f(res_df, k, i)
-                    res_df = pd.merge(res_df, tmp_res_df, how='inner')
-            elif isinstance(v, str):
-                res_df = f(res_df, k, v)
-            elif isinstance(v, int):
-                res_df = res_df[res_df[k] == v]
+        res_df = num.compile_query(**kwargs).apply(self.df, self.indexes)
         if sort_by:
-            res_df.sort_values(by=sort_by, ascending=ascending, inplace=True)
+            res_df = res_df.sort_values(by=sort_by, ascending=ascending)
             
         return res_df
     
@@ -524,17 +541,15 @@ class SeqDB(Database):
         if not seq_name_encoder:
             seq_name_encoder = lambda x: str(x['info_id'])
 
-        fasta_lines = []
-        for _, item in enumerate(self.gen_seq(sort_by, ascending, **kwargs)):
-            i, seq_id, seq = item
-            seq_name = seq_name_encoder(self[i])
-            fasta_lines.append('>{}\n{}'.format(seq_name, seq))
-
-        with open(fasta_path, 'w') as f:
-            if itemnum:
-                print('itemnum: {}'.format(len(fasta_lines)), file=f)
-            print('\n'.join(fasta_lines), file=f)
-
+        # Sequences are written in chunks instead of building all lines
+        records = (
+            (seq_name_encoder(self[i]), seq)
+            for i, _, seq in self.gen_seq(sort_by, ascending, **kwargs))
+        if itemnum:
+            # The list refers to the registered sequences without copying
+            records = list(records)
+        text.write_fasta(fasta_path, records,
+                         itemnum=len(records) if itemnum else None)
 
     def load_seq(self, seq_path, format='pickle'):
         if format == 'pickle':
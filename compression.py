@@ -0,0 +1,229 @@
+""" Transparent decompression of input files and compression of output
+files. The compression format of an input file is detected from magic bytes,
+so readers can open plain, gzip, BGZF and Zstandard files in the same way.
+BGZF blocks are decompressed in parallel by a thread pool. The compression
+format of an output file is inferred from its suffix.
+"""
+
+import io
+import os
+import gzip
+import zlib
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, Optional
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Size of a buffer of a decompressed stream
+BUFFER_SIZE = 2 ** 20
+
+# Default compression levels of output files. Lower than the maxima because
+# writing speed matters more than size for intermediate files.
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Compression formats of output files inferred from suffixes
+OUTPUT_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+# Number of BGZF blocks decompressed ahead per thread
+BLOCKS_PER_THREAD = 4
+
+def detect_compression(file_path: str) -> str:
+    """Returns the compression format of a file: 'bgzf', 'gzip', 'zstd' or
+    '' (not compressed).
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(18)
+
+    if head.startswith(ZSTD_MAGIC):
+        return 'zstd'
+
+    if head.startswith(GZIP_MAGIC):
+        if _is_bgzf_header(head):
+            return 'bgzf'
+        return 'gzip'
+
+    return ''
+
+def open_input(file_path: str, threads: int = 0) -> BinaryIO:
+    """Opens a file by a binary read mode. Compressed files are decompressed
+    while being read.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to input file.
+    threads: int, optional (default: 0)
+        The number of threads to decompress BGZF blocks. 0 means the number
+        of CPUs.
+
+    Return
+    ------
+    BinaryIO
+        Binary file object of decompressed data.
+    """
+    compression = detect_compression(file_path)
+
+    if compression == 'bgzf':
+        if threads == 0:
+            threads = os.cpu_count() or 1
+        return io.BufferedReader(BgzfReader(file_path, threads), BUFFER_SIZE)
+
+    if compression == 'gzip':
+        return io.BufferedReader(gzip.open(file_path, 'rb'), BUFFER_SIZE)
+
+    if compression == 'zstd':
+        zstandard = _import_zstandard(file_path)
+        f = open(file_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            f, closefd=True, read_across_frames=True)
+        return io.BufferedReader(reader, BUFFER_SIZE)
+
+    return open(file_path, 'rb')
+
+def open_output(
+        file_path:      str,
+        compression:    str = 'infer',
+        level:          Optional[int] = None
+        ) -> BinaryIO:
+    """Opens a file by a binary write mode with a large buffer. Data are 
+    compressed while being written.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to output file.
+    compression: str, optional (default: 'infer')
+        'gzip', 'zstd' or '' (not compressed). 'infer' means 'gzip' if 
+        file_path ends with '.gz', 'zstd' if it ends with '.zst' and '' 
+        otherwise.
+    level: int, optional (default: None)
+        Compression level. If None, GZIP_LEVEL or ZSTD_LEVEL is used.
+
+    Return
+    ------
+    BinaryIO
+        Binary file object.
+    """
+    if compression == 'infer':
+        compression = OUTPUT_SUFFIXES.get(os.path.splitext(file_path)[1], '')
+
+    if compression == 'gzip':
+        if level is None:
+            level = GZIP_LEVEL
+        return io.BufferedWriter(
+            gzip.open(file_path, 'wb', compresslevel=level), BUFFER_SIZE)
+
+    if compression == 'zstd':
+        zstandard = _import_zstandard(file_path)
+        if level is None:
+            level = ZSTD_LEVEL
+        writer = zstandard.ZstdCompressor(level=level).stream_writer(
+            open(file_path, 'wb'), closefd=True)
+        return io.BufferedWriter(writer, BUFFER_SIZE)
+
+    if compression != '':
+        raise ValueError(f'Unknown compression: {compression}')
+    return open(file_path, 'wb', buffering=BUFFER_SIZE)
+
+def is_compressed(file_path: str) -> bool:
+    """Returns True if a file is compressed in a format of open_input. """
+    return detect_compression(file_path) != ''
+
+def check_not_compressed(file_path: str) -> None:
+    """Raises ValueError if a file is compressed because byte offsets of
+    compressed data cannot be used for random access.
+    """
+    if is_compressed(file_path):
+        raise ValueError(f'Compressed file is not supported: {file_path}')
+
+class BgzfReader(io.RawIOBase):
+    """Reads decompressed data of a BGZF file.
+
+    BGZF is a series of gzip members (blocks) whose header records the size
+    of the block. Blocks are read sequentially and decompressed in a thread
+    pool (zlib releases the GIL), and decompressed data are returned in the
+    original order.
+    """
+
+    def __init__(self, file_path: str, threads: int = 1) -> None:
+        self._f = open(file_path, 'rb')
+        self._executor = ThreadPoolExecutor(threads)
+        self._blocks = self._iter_decompressed(threads * BLOCKS_PER_THREAD)
+        self._data = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._data) == 0:
+            data = next(self._blocks, None)
+            if data is None:
+                return 0
+            self._data = memoryview(data)
+
+        n = min(len(b), len(self._data))
+        b[:n] = self._data[:n]
+        self._data = self._data[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._executor.shutdown(cancel_futures=True)
+            self._f.close()
+        super().close()
+
+    def _iter_decompressed(self, max_pending: int) -> Iterator[bytes]:
+        """Yields decompressed data of each block in the original order while
+        keeping at most max_pending blocks in the thread pool.
+        """
+        pending = deque()
+
+        for block in _iter_bgzf_blocks(self._f):
+            pending.append(self._executor.submit(_decompress_block, block))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+def _import_zstandard(file_path):
+    """Returns zstandard module, which is required only for Zstandard files. """
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            f'zstandard package is required for {file_path}.') from e
+    return zstandard
+
+def _is_bgzf_header(head: bytes) -> bool:
+    """Returns True if a gzip header has the BGZF extra subfield ('BC'). """
+    # FLG.FEXTRA, XLEN = 6, SI1 = 'B', SI2 = 'C' and SLEN = 2
+    return len(head) >= 16 and head[3] & 4 != 0 \
+        and head[10:12] == b'\x06\x00' and head[12:16] == b'BC\x02\x00'
+
+def _iter_bgzf_blocks(f: BinaryIO) -> Iterator[bytes]:
+    """Yields raw BGZF blocks of a binary file object. """
+    while True:
+        head = f.read(18)
+        if len(head) == 0:
+            return
+        if not _is_bgzf_header(head):
+            raise ValueError('Invalid BGZF block header.')
+
+        # BSIZE is the total block size minus 1
+        block_size = struct.unpack('<H', head[16:18])[0] + 1
+        yield head + f.read(block_size - 18)
+
+def _decompress_block(block: bytes) -> bytes:
+    """Decompresses one BGZF block and checks its CRC32 and size. """
+    data = zlib.decompress(block[18:-8], -zlib.MAX_WBITS)
+    crc, size = struct.unpack('<II', block[-8:])
+
+    if zlib.crc32(data) != crc or len(data) != size:
+        raise ValueError('BGZF block is corrupted.')
+
+    return data
@@ -0,0 +1,253 @@
+""" Random access to regions of a FASTA file by a samtools-compatible index
+(.fai). Byte offsets of a region are computed from the line width of each
+sequence, and only the bytes of the region are read from a memory-mapped file.
+"""
+
+import os
+import mmap
+import numpy as np
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from .compression import check_not_compressed
+
+FAI_SUFFIX = '.fai'
+
+# Number of bytes searched for line terminators at once when an index is built
+NEWLINE_CHUNK_SIZE = 2 ** 26
+
+class FaiEntry(NamedTuple):
+    """One line of a .fai file. """
+    length: int     # The number of bases
+    offset: int     # Byte offset of the first base
+    line_bases: int # The number of bases in a line
+    line_width: int # The number of bytes in a line including the terminator
+
+class FastaIndex:
+    """Reads regions of sequences in a FASTA file by its index.
+
+    Coordinates are 0-based and half-open as in Python slices, e.g.,
+    fetch('chr1', 0, 10) returns the first 10 bases of chr1.
+
+    How-to-use
+    ----------
+    with FastaIndex('genome.fa') as fasta:
+        seq = fasta.fetch('chr1', 1000, 2000)
+        seqs = fasta.fetch_many([('chr2', 0, 50), ('chr1', 10, 20)])
+    """
+
+    def __init__(self, fasta_path: str, fai_path: str = '') -> None:
+        """Creates FastaIndex instance. The index is built by build_fai if
+        fai_path (default: fasta_path + '.fai') does not exist or is stale
+        (see is_fai_stale).
+        """
+        check_not_compressed(fasta_path)
+
+        if fai_path == '':
+            fai_path = fasta_path + FAI_SUFFIX
+        self.index = None
+        if os.path.isfile(fai_path):
+            self.index = read_fai(fai_path)
+            if is_fai_stale(self.index, fasta_path, fai_path):
+                self.index = None
+        if self.index is None:
+            self.index = build_fai(fasta_path, fai_path)
+
+        self.fasta_path = fasta_path
+        with open(fasta_path, 'rb') as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size > 0:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mm = b''
+
+    def fetch(self, name: str, start: int = 0, end: int = None) -> str:
+        """Returns bases from start to end of a sequence. end is clipped to the
+        sequence length. KeyError is raised if the name is not indexed.
+        """
+        first, last = self._byte_range(name, start, end)
+        return self._mm[first:last].translate(None, b'\r\n').decode('ascii')
+
+    def fetch_many(self, regions: Iterable[Tuple[str, int, int]]) -> List[str]:
+        """Returns bases of (name, start, end) regions in the given order.
+        Regions are read in the order of byte offsets so that the file is
+        accessed sequentially.
+        """
+        byte_ranges = [self._byte_range(*region) for region in regions]
+        seqs = [''] * len(byte_ranges)
+
+        for i in sorted(range(len(byte_ranges)), key=byte_ranges.__getitem__):
+            first, last = byte_ranges[i]
+            seqs[i] = self._mm[first:last].translate(None, b'\r\n') \
+                .decode('ascii')
+
+        return seqs
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+
+    def __enter__(self) -> 'FastaIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _byte_range(self, name, start, end):
+        """Returns the byte range of bases from start to end. """
+        entry = self.index[name]
+        if end is None or end > entry.length:
+            end = entry.length
+        if start < 0 or start > end:
+            raise ValueError(
+                f'Invalid region of {name}: {start}-{end} '
+                f'(length: {entry.length})')
+        if start == end:
+            return 0, 0
+
+        return _base_offset(entry, start), _base_offset(entry, end - 1) + 1
+
+def build_fai(fasta_path: str, fai_path: str = '') -> Dict[str, FaiEntry]:
+    """Build a .fai index of a FASTA file and save it.
+
+    As samtools faidx, all lines of a sequence except the last one must have
+    the same length, otherwise ValueError is raised. A sequence name is the
+    first word of a '>' line.
+
+    Parameters
+    ----------
+    fasta_path: str
+        Path to a FASTA file. Compressed files are not supported.
+    fai_path: str, optional (default: '')
+        Path to the index file. If not given, '.fai' is added to fasta_path.
+
+    Return
+    ------
+    Dict[str, FaiEntry]
+        Index entry of each sequence in the order of the file.
+    """
+    check_not_compressed(fasta_path)
+
+    if fai_path == '':
+        fai_path = fasta_path + FAI_SUFFIX
+
+    index = {}
+    with open(fasta_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for name, seq_start, seq_end in _iter_records(mm):
+                    assert name not in index, f'Duplicated name: {name}'
+                    index[name] = _index_record(mm, name, seq_start, seq_end)
+
+    write_fai(index, fai_path)
+    return index
+
+def read_fai(fai_path: str) -> Dict[str, FaiEntry]:
+    """Read a .fai index file. Columns after the fifth one (.fai of FASTQ
+    files) are ignored.
+    """
+    index = {}
+    with open(fai_path, 'r') as f:
+        for l in f:
+            columns = l.rstrip('\n').split('\t')
+            index[columns[0]] = FaiEntry(*map(int, columns[1:5]))
+    return index
+
+def write_fai(index: Dict[str, FaiEntry], fai_path: str) -> None:
+    """Write index entries to a .fai file. """
+    with open(fai_path, 'w') as f:
+        for name, entry in index.items():
+            print(name, *entry, sep='\t', file=f)
+
+def is_fai_stale(
+        index:      Dict[str, FaiEntry],
+        fasta_path: str,
+        fai_path:   str
+        ) -> bool:
+    """Returns True if an index file is older than its FASTA file, or if
+    bases of an entry are beyond the end of the FASTA file.
+    """
+    fasta_stat = os.stat(fasta_path)
+    if os.stat(fai_path).st_mtime_ns < fasta_stat.st_mtime_ns:
+        return True
+
+    for entry in index.values():
+        end = entry.offset if entry.length == 0 \
+            else _base_offset(entry, entry.length - 1) + 1
+        if end > fasta_stat.st_size:
+            return True
+    return False
+
+def _base_offset(entry, pos):
+    """Returns the byte offset of a base. """
+    return entry.offset + pos // entry.line_bases * entry.line_width \
+        + pos % entry.line_bases
+
+def _iter_records(mm):
+    """Yields a name, the offset of sequence start and the offset of sequence
+    end of each record.
+    """
+    pos = mm.find(b'>')
+    if pos > 0 and mm[:pos].strip() != b'':
+        raise ValueError('FASTA file must start with a ">" line.')
+
+    while pos >= 0:
+        header_end = mm.find(b'\n', pos)
+        if header_end < 0:
+            header_end = len(mm)
+        words = mm[pos + 1:header_end].split()
+        if len(words) == 0:
+            raise ValueError(f'Empty sequence name at byte {pos}.')
+
+        next_pos = mm.find(b'\n>', header_end)
+        seq_end = len(mm) if next_pos < 0 else next_pos + 1
+        yield words[0].decode(), min(header_end + 1, len(mm)), seq_end
+        pos = next_pos if next_pos < 0 else next_pos + 1
+
+def _index_record(mm, name, seq_start, seq_end):
+    """Returns FaiEntry of a sequence between seq_start and seq_end. """
+    # Terminators of the last line and trailing empty lines are not counted
+    while seq_end > seq_start and mm[seq_end - 1] in b'\r\n':
+        seq_end -= 1
+
+    size = seq_end - seq_start
+    newlines = _find_newlines(mm, seq_start, seq_end)
+    if len(newlines) == 0:
+        # The terminator of a single line is the same as the header line
+        # even if the line is not terminated at the end of the file
+        has_cr = seq_start >= 2 and mm[seq_start - 2] == ord('\r')
+        return FaiEntry(size, seq_start, size, size + (2 if has_cr else 1))
+
+    has_cr = newlines[0] > 0 and mm[seq_start + newlines[0] - 1] == ord('\r')
+    terminator = 2 if has_cr else 1
+    line_width = int(newlines[0]) + 1
+    line_bases = line_width - terminator
+
+    # All lines except the last one have the same width
+    expected = np.arange(1, len(newlines) + 1, dtype=np.int64) * line_width
+    last_line_bases = size - len(newlines) * line_width
+    if not np.array_equal(newlines + 1, expected) or last_line_bases > line_bases:
+        raise ValueError(f'Lines of {name} have different lengths.')
+
+    return FaiEntry(size - len(newlines) * terminator, seq_start, line_bases,
+                    line_width)
+
+def _find_newlines(mm, start, end):
+    """Returns positions of '\\n' between start and end relative to start. """
+    positions = []
+    for chunk_start in range(start, end, NEWLINE_CHUNK_SIZE):
+        chunk_end = min(chunk_start + NEWLINE_CHUNK_SIZE, end)
+        chunk = np.frombuffer(mm, dtype=np.uint8, count=chunk_end - chunk_start,
+                              offset=chunk_start)
+        positions.append(np.flatnonzero(chunk == ord('\n')) + chunk_start - start)
+
+    if len(positions) == 0:
+        return np.array([], dtype=np.int64)
+    return np.concatenate(positions)
+
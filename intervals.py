@@ -0,0 +1,291 @@
+""" Index of genomic intervals for batch overlap queries. Intervals of each
+chromosome are kept in arrays sorted by start together with the running
+maximum of ends, so that all queries are answered by binary searches
+(np.searchsorted) without Python loops over intervals or queries.
+
+Intervals are half-open ([start, end)) as in BED files.
+
+A long interval keeps the running maximum of ends high, so that queries after
+it would have many candidates. As in augmented interval lists (Feng et al.,
+2019), intervals covering many following intervals are moved to another list
+with its own running maximum of ends, and overlaps are searched in each list.
+"""
+
+import numpy as np
+
+from typing import Dict, Iterator, NamedTuple, Tuple
+
+# The number of queries searched at once in overlap_pairs
+QUERY_CHUNK_SIZE = 2 ** 20
+
+# The number of candidate pairs checked at once in overlap_pairs
+CANDIDATE_CHUNK_SIZE = 2 ** 22
+
+# An interval covering at least half of this number of following intervals
+# is moved to the next list
+COVER_SPAN = 20
+
+# The maximum number of lists of intervals of a chromosome
+MAX_LISTS = 10
+
+class _IntervalList(NamedTuple):
+    """Intervals of a list searched with the running maximum of ends. """
+    starts: np.ndarray      # Starts in ascending order
+    ends: np.ndarray        # Ends in the order of starts
+    max_ends: np.ndarray    # Running maximum of ends
+    ranks: np.ndarray       # Positions in _ChromIntervals.starts
+
+class _ChromIntervals(NamedTuple):
+    """Sorted arrays of intervals of one chromosome. """
+    starts: np.ndarray      # Starts in ascending order
+    ends: np.ndarray        # Ends in the order of starts
+    max_ends: np.ndarray    # Running maximum of ends
+    ids: np.ndarray         # Original positions in the order of starts
+    sorted_ends: np.ndarray # Ends in ascending order
+    end_ids: np.ndarray     # Original positions in the order of sorted_ends
+    empty_starts: np.ndarray    # Sorted starts of empty intervals
+    lists: list             # _IntervalList of intervals for overlap_pairs
+
+class IntervalIndex:
+    """Index of intervals of each chromosome.
+
+    Results refer to an interval by its position in the arrays given for the
+    chromosome (e.g., the line order of a chromosome in bed.read_bed).
+
+    How-to-use
+    ----------
+    genes = IntervalIndex(bed.read_bed('genes.bed', usecols=('start', 'end')))
+    for chunk in bed.iter_bed('reads.bed', usecols=('chrom', 'start', 'end')):
+        ...
+    genes.count_overlaps('2L', read_starts, read_ends)
+    """
+
+    def __init__(self, intervals: Dict[str, Dict[str, np.ndarray]]) -> None:
+        """Creates IntervalIndex instance from a dictionary of 'start' and
+        'end' arrays of each chromosome, such as the output of bed.read_bed.
+        """
+        self._chroms = {}
+
+        for chrom, columns in intervals.items():
+            starts = np.asarray(columns['start'], dtype=np.int64)
+            ends = np.asarray(columns['end'], dtype=np.int64)
+            assert len(starts) == len(ends), \
+                f'Different numbers of starts and ends in {chrom}.'
+            assert (starts <= ends).all(), \
+                f'An end is before a start in {chrom}.'
+
+            ids = np.argsort(starts, kind='stable')
+            end_ids = np.argsort(ends, kind='stable')
+            sorted_ends = ends[end_ids]
+            starts, ends = starts[ids], ends[ids]
+            self._chroms[chrom] = _ChromIntervals(
+                starts, ends, np.maximum.accumulate(ends), ids,
+                sorted_ends, end_ids, starts[starts == ends],
+                _split_lists(starts, ends))
+
+    @property
+    def chroms(self):
+        return list(self._chroms)
+
+    def __len__(self) -> int:
+        return sum(len(c.starts) for c in self._chroms.values())
+
+    def count_overlaps(self,
+            chrom:  str,
+            starts: np.ndarray,
+            ends:   np.ndarray
+            ) -> np.ndarray:
+        """Returns the number of intervals overlapping each query.
+
+        An interval overlaps a query if it starts before the query ends and
+        ends after the query starts. Such intervals are the intervals starting
+        before the query end except the ones ending at or before the query
+        start, so two binary searches give the count. The only exception is
+        an empty interval at the position of an empty query, which ends at
+        the query start but does not start before the query end.
+        """
+        order, starts, ends = _sort_queries(starts, ends)
+        c = self._chroms.get(chrom)
+        if c is None:
+            return np.zeros(len(starts), dtype=np.int64)
+
+        counts = np.searchsorted(c.starts, ends, side='left') \
+            - np.searchsorted(c.sorted_ends, starts, side='right')
+        empty = starts == ends
+        if len(c.empty_starts) > 0 and empty.any():
+            counts[empty] += \
+                np.searchsorted(c.empty_starts, starts[empty], side='right') \
+                - np.searchsorted(c.empty_starts, starts[empty], side='left')
+        return _unsort(order, counts)
+
+    def overlap_pairs(self,
+            chrom:  str,
+            starts: np.ndarray,
+            ends:   np.ndarray
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns positions of queries and intervals of overlapping pairs.
+        Pairs are sorted by query starts and then by interval starts.
+        """
+        order, starts, ends = _sort_queries(starts, ends)
+        query_ids = []
+        ranks = []
+
+        for pairs in self._iter_pairs(chrom, starts, ends):
+            query_ids.append(pairs[0])
+            ranks.append(pairs[1])
+
+        if len(query_ids) == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty.copy()
+        query_ids = np.concatenate(query_ids)
+        ranks = np.concatenate(ranks)
+
+        # Pairs of each list are sorted, so merge pairs of lists
+        if len(self._chroms[chrom].lists) > 1:
+            pair_order = np.lexsort((ranks, query_ids))
+            query_ids, ranks = query_ids[pair_order], ranks[pair_order]
+        if order is not None:
+            query_ids = order[query_ids]
+        return query_ids, self._chroms[chrom].ids[ranks]
+
+    def nearest(self,
+            chrom:  str,
+            starts: np.ndarray,
+            ends:   np.ndarray
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the nearest interval of each query and the distance.
+
+        The distance is 0 for an overlapping interval and otherwise the number
+        of bases between the query and the interval. An overlapping interval
+        with the smallest start is chosen, and the upstream interval is chosen
+        for a tie. The position is -1 if the chromosome has no interval.
+        """
+        order, starts, ends = _sort_queries(starts, ends)
+        nearest_ids = np.full(len(starts), -1, dtype=np.int64)
+        distances = np.full(len(starts), -1, dtype=np.int64)
+        c = self._chroms.get(chrom)
+        if c is None or len(c.starts) == 0:
+            return nearest_ids, distances
+
+        # Interval starting after the query
+        right = np.searchsorted(c.starts, ends, side='left')
+        has_right = right < len(c.starts)
+        right_distances = np.where(
+            has_right, c.starts[np.minimum(right, len(c.starts) - 1)] - ends,
+            np.iinfo(np.int64).max)
+
+        # Interval ending before the query
+        left = np.searchsorted(c.sorted_ends, starts, side='right') - 1
+        has_left = left >= 0
+        left_distances = np.where(
+            has_left, starts - c.sorted_ends[np.maximum(left, 0)],
+            np.iinfo(np.int64).max)
+
+        use_left = has_left & (left_distances <= right_distances)
+        nearest_ids[use_left] = c.end_ids[left[use_left]]
+        distances[use_left] = left_distances[use_left]
+        use_right = has_right & ~use_left
+        nearest_ids[use_right] = c.ids[right[use_right]]
+        distances[use_right] = right_distances[use_right]
+
+        # The first interval whose running maximum of ends is after the query
+        # start ends after the query start. It overlaps the query if it
+        # starts before the query end.
+        first = np.searchsorted(c.max_ends, starts, side='right')
+        overlapping = first < right
+        nearest_ids[overlapping] = c.ids[first[overlapping]]
+        distances[overlapping] = 0
+
+        return _unsort(order, nearest_ids), _unsort(order, distances)
+
+    def _iter_pairs(self,
+            chrom:  str,
+            starts: np.ndarray,
+            ends:   np.ndarray
+            ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields positions of sorted queries and ranks (positions in the
+        order of starts) of intervals of overlapping pairs. Pairs of each
+        list are yielded in chunks of at most CANDIDATE_CHUNK_SIZE
+        candidates.
+        """
+        c = self._chroms.get(chrom)
+        if c is None:
+            return
+
+        for l in c.lists:
+            for offset in range(0, len(starts), QUERY_CHUNK_SIZE):
+                chunk_starts = starts[offset:offset + QUERY_CHUNK_SIZE]
+                chunk_ends = ends[offset:offset + QUERY_CHUNK_SIZE]
+
+                # Candidates start before the query end and are not before
+                # the first interval whose running maximum of ends is after
+                # the query start. Candidates ending before the query start
+                # (nested in a longer interval) are removed later.
+                lo = np.searchsorted(l.max_ends, chunk_starts, side='right')
+                hi = np.searchsorted(l.starts, chunk_ends, side='left')
+                counts = np.maximum(hi - lo, 0)
+                # End of candidates of each query in all candidates
+                bounds = np.cumsum(counts)
+                total = int(bounds[-1]) if len(bounds) > 0 else 0
+
+                for first in range(0, total, CANDIDATE_CHUNK_SIZE):
+                    candidate_ids = np.arange(
+                        first, min(first + CANDIDATE_CHUNK_SIZE, total))
+                    query_ids = np.searchsorted(
+                        bounds, candidate_ids, side='right')
+                    # Position of each candidate within the candidates of its
+                    # query
+                    candidates = lo[query_ids] + candidate_ids \
+                        - (bounds - counts)[query_ids]
+
+                    overlap = l.ends[candidates] > chunk_starts[query_ids]
+                    yield (query_ids[overlap] + offset,
+                           l.ranks[candidates[overlap]])
+
+def _split_lists(starts, ends):
+    """Splits intervals sorted by starts into _IntervalList. Intervals
+    covering at least half of the COVER_SPAN following intervals are moved to
+    the next list, up to MAX_LISTS lists.
+    """
+    lists = []
+    ranks = np.arange(len(starts))
+
+    while len(lists) < MAX_LISTS - 1 and len(ranks) > COVER_SPAN:
+        list_ends = ends[ranks]
+        # An interval covers a following one if it does not end before it
+        covered = np.zeros(len(ranks), dtype=np.int64)
+        for k in range(1, COVER_SPAN + 1):
+            covered[:-k] += list_ends[k:] <= list_ends[:-k]
+        long = covered >= COVER_SPAN // 2
+        if not long.any():
+            break
+        lists.append(ranks[~long])
+        ranks = ranks[long]
+    lists.append(ranks)
+
+    return [
+        _IntervalList(starts[r], ends[r], np.maximum.accumulate(ends[r]), r)
+        for r in lists if len(r) > 0]
+
+def _sort_queries(starts, ends):
+    """Converts query starts and ends to int64 arrays sorted by starts.
+    Binary searches of sorted queries are much faster because of memory
+    locality. Returns the order of sorting (None if already sorted), starts
+    and ends.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    assert starts.shape == ends.shape, 'Different numbers of starts and ends.'
+
+    if (starts[1:] >= starts[:-1]).all():
+        return None, starts, ends
+    order = np.argsort(starts)
+    return order, starts[order], ends[order]
+
+def _unsort(order, values):
+    """Returns values of sorted queries in the original order of queries. """
+    if order is None:
+        return values
+    result = np.empty_like(values)
+    result[order] = values
+    return result
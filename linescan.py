@@ -0,0 +1,293 @@
+""" A buffered line scanner shared by the file readers in parse and text
+modules. A file is read in large binary blocks, lines are classified by one
+precompiled regular expression, and only lines that are kept are decoded.
+split_file splits a file into byte ranges at line starts for parallel readers.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import List, Tuple, Iterator, Iterable, BinaryIO, Callable, \
+    Optional
+
+# Size of a binary block read at once
+BLOCK_SIZE = 2 ** 20
+
+# Kinds of events yielded by LineScanner.scan
+HEADER  = 0 # One header line
+ITEMNUM = 1 # One line starting with 'itemnum:'
+COMMENT = 2 # One line starting with a comment string
+DIVISOR = 3 # One line starting with an item divisor
+VALUES  = 4 # A run of one or more value lines (each terminated by '\n')
+
+_KINDS = {'itemnum': ITEMNUM, 'comment': COMMENT, 'divisor': DIVISOR}
+
+class LineScanner:
+    """Scans lines of a binary file object and yields (kind, data) events.
+
+    Lines are classified in the following order of priority: header (the
+    first skip_headers non-empty lines), 'itemnum:' line, comment line, item
+    divisor line and value line. This is the same order as parse.read_1D_list
+    and parse.read_2D_list. Consecutive value lines are yielded together as
+    one VALUES event, so that they can be split or joined at once.
+
+    Line terminators are '\\n' and '\\r\\n'. Data of HEADER, ITEMNUM, COMMENT
+    and DIVISOR events are binary lines without the line terminator.
+    """
+
+    def __init__(self,
+            comments:           Iterable[str] = (),
+            item_divisor:       str = '',
+            itemnum:            bool = False,
+            skip_empty_lines:   bool = True,
+            skip_headers:       int = 0,
+            encoding:           str = 'utf-8',
+            block_size:         Optional[int] = None
+            ) -> None:
+        """Creates LineScanner instance.
+
+        Parameters
+        ----------
+        comments: Iterable[str], optional (default: ())
+            Strings that indicate comment lines.
+        item_divisor: str, optional (default: '')
+            String that indicates a start of an item. Empty string means that
+            no line is an item divisor.
+        itemnum: bool, optional (default: False)
+            Whether to classify lines starting with 'itemnum:'.
+        skip_empty_lines: bool, optional (default: True)
+            Whether to drop empty lines from VALUES events.
+        skip_headers: int, optional (default: 0)
+            The number of header lines. Empty lines are not counted.
+        encoding: str, optional (default: 'utf-8')
+            Encoding used to decode kept lines.
+        block_size: int, optional (default: None)
+            Number of bytes read at once. BLOCK_SIZE is used if None.
+        """
+        self.comments = tuple(comments)
+        self.item_divisor = item_divisor
+        self.itemnum = itemnum
+        self.skip_empty_lines = skip_empty_lines
+        self.skip_headers = skip_headers
+        self.encoding = encoding
+        self.block_size = BLOCK_SIZE if block_size is None else block_size
+
+        self._matchers = _compile_matchers(self.comments, item_divisor, itemnum)
+
+    def scan(self, f: BinaryIO, size: int = -1) -> Iterator[Tuple[int, bytes]]:
+        """Yields (kind, data) events from the current position of a binary
+        file object. If size is not negative, at most size bytes are read.
+        """
+        headers_left = self.skip_headers
+        remaining = size
+        tail = b''
+        if self._matchers is not None:
+            line_matcher, next_matcher = self._matchers
+
+        while True:
+            if remaining < 0:
+                block = f.read(self.block_size)
+            else:
+                block = f.read(min(self.block_size, remaining))
+                remaining -= len(block)
+
+            if block:
+                buf = tail + block
+                # Keep an incomplete last line for the next block
+                cut = buf.rfind(b'\n') + 1
+                if cut == 0:
+                    tail = buf
+                    continue
+                buf, tail = buf[:cut], buf[cut:]
+            elif tail:
+                # The last line does not end with a line terminator
+                buf, tail = tail + b'\n', b''
+            else:
+                break
+
+            pos = 0
+            if headers_left > 0:
+                headers_left, pos = yield from self._scan_headers(
+                    buf, headers_left)
+
+            if self._matchers is None:
+                if pos < len(buf):
+                    yield VALUES, buf[pos:]
+                continue
+
+            # Search for classified lines. Value lines between them are 
+            # yielded as one run. 
+            buf_size = len(buf)
+            while pos < buf_size:
+                m = line_matcher.match(buf, pos)
+
+                if m is None:
+                    # The matched '\n' is the end of the previous line
+                    m = next_matcher.search(buf, pos, buf_size - 1)
+                    if m is None:
+                        break
+
+                    start = m.start() + 1
+                    yield VALUES, buf[pos:start]
+                    pos = start
+
+                end = buf.index(b'\n', pos)
+                line = buf[pos:end]
+                if line[-1:] == b'\r':
+                    line = line[:-1]
+                yield _KINDS[m.lastgroup], line
+                pos = end + 1
+
+            if pos < buf_size:
+                yield VALUES, buf[pos:]
+
+    def decode(self, line: bytes) -> str:
+        """Decodes one binary line. """
+        return line.decode(self.encoding)
+
+    def split_values(self, run: bytes) -> List[str]:
+        """Returns a list of decoded lines in a VALUES event. """
+        text = run.decode(self.encoding)
+        lines = text.split('\n')
+        # The run always ends with '\n'
+        lines.pop()
+
+        if '\r' in text:
+            lines = [l[:-1] if l.endswith('\r') else l for l in lines]
+        if self.skip_empty_lines and '' in lines:
+            lines = [l for l in lines if l != '']
+
+        return lines
+
+    def join_values(self, run: bytes) -> str:
+        """Returns a decoded string of all lines in a VALUES event joined
+        without line terminators.
+        """
+        if b'\r' in run:
+            run = run.replace(b'\r\n', b'\n')
+        return run.replace(b'\n', b'').decode(self.encoding)
+
+    def _scan_headers(self, buf, headers_left):
+        """Yields events of lines one by one until all header lines are found.
+        Returns the number of header lines left and the position in buf.
+        """
+        pos = 0
+
+        while headers_left > 0 and pos < len(buf):
+            end = buf.index(b'\n', pos) + 1
+            line = strip_line_end(buf[pos:end])
+
+            if line != b'':
+                yield HEADER, line
+                headers_left -= 1
+            elif not self.skip_empty_lines:
+                # An empty line is not a header but is classified as usual
+                m = None
+                if self._matchers is not None:
+                    m = self._matchers[0].match(line)
+                if m is None:
+                    yield VALUES, buf[pos:end]
+                else:
+                    yield _KINDS[m.lastgroup], line
+
+            pos = end
+
+        return headers_left, pos
+
+@lru_cache(maxsize=None)
+def _compile_matchers(comments, item_divisor, itemnum):
+    """Returns a pair of compiled regular expressions, one matching a start of 
+    a line that is not a value line and the other searching for such a line 
+    after a line terminator. None is returned if every line is a value line. 
+    """
+    groups = []
+    if itemnum:
+        groups.append(rb'(?P<itemnum>itemnum:)')
+    if len(comments) > 0:
+        groups.append(rb'(?P<comment>' + b'|'.join(
+            re.escape(comment.encode()) for comment in comments) + b')')
+    if item_divisor != '':
+        groups.append(rb'(?P<divisor>' + re.escape(item_divisor.encode()) + b')')
+
+    if len(groups) == 0:
+        return None
+
+    # Alternatives are tried from left to right, which gives the priority. 
+    # Searching for a literal '\n' first is much faster than '^' in the 
+    # multi-line mode. 
+    pattern = rb'(?:' + b'|'.join(groups) + rb')'
+    return re.compile(pattern), re.compile(rb'\n' + pattern)
+
+def strip_line_end(line: bytes) -> bytes:
+    """Removes a line terminator ('\\n' or '\\r\\n') from a binary line. """
+    if line.endswith(b'\n'):
+        line = line[:-1]
+    if line.endswith(b'\r'):
+        line = line[:-1]
+    return line
+
+def split_file(
+        file_path   : str,
+        chunk_num   : int,
+        skip_headers: int = 0,
+        is_boundary : Optional[Callable[[bytes], bool]] = None
+        ) -> List[Tuple[int, int]]:
+    """Splits a file into byte ranges. 
+
+    Each range starts at the beginning of a line. If is_boundary is given, a 
+    range starts only at a line (without line terminator) for which 
+    is_boundary returns True. The first range always contains the first 
+    skip_headers non-empty lines. 
+
+    Return
+    ------
+    List[Tuple[int, int]]
+        List of (start, end) byte offsets. 
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+
+    with open(file_path, 'rb') as f:
+        # Find the end of header lines
+        line_count = 0
+        while line_count < skip_headers:
+            l = f.readline()
+            if not l:
+                break
+            if strip_line_end(l) != b'':
+                line_count += 1
+        header_end = f.tell()
+
+        step = max((size - header_end) // chunk_num, 1)
+
+        for n in range(1, chunk_num):
+            pos = header_end + n * step
+            if pos >= size:
+                break
+            if pos <= boundaries[-1]:
+                continue
+
+            # Move to the start of the next line. Reading from the previous 
+            # byte keeps pos itself when it is already a line start. 
+            f.seek(pos - 1)
+            f.readline()
+            boundary = _find_boundary(f, is_boundary)
+
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _find_boundary(f, is_boundary):
+    """Returns the offset of the first line for which is_boundary returns True 
+    from the current position of a binary file object. 
+    """
+    if is_boundary is None:
+        return f.tell()
+
+    while True:
+        pos = f.tell()
+        l = f.readline()
+        if not l or is_boundary(strip_line_end(l)):
+            return pos
@@ -1,14 +1,55 @@
+import io
 import os
 import re
 import numpy as np
 import pandas as pd
 
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 
 from evogen_share.stats import bootstrap
 
+from .compression import open_input, is_compressed
+from .linescan import split_file
+
+# Statistics computed by rolling_windows
+WINDOW_STATS = ('mean', 'sum', 'count', 'min', 'max', 'var', 'std')
+
+# Each column is shifted by its first non-NaN value in these rows before
+# cumulative sums to reduce rounding errors of sums of squares
+WINDOW_SHIFT_ROWS = 1024
+
+# The number of rows of a track read at once by stream_windows
+WINDOW_CHUNK_SIZE = 2 ** 20
+
+# The number of rows of a CSV file counted at once by count_csv
+COUNT_CHUNK_SIZE = 2 ** 20
+
+# Byte ranges of a CSV file given to each process by count_csv
+COUNT_CHUNKS_PER_WORKER = 4
+
+class WindowTotals(NamedTuple):
+    '''Cumulative sums of shifted values, their squares and the number of 
+    non-NaN values of each column. Each field is an array of (rows, columns) 
+    or (columns,) for totals at one row.
+    '''
+    sums: np.ndarray
+    squares: np.ndarray
+    counts: np.ndarray
+
 def slide_window(data_df, win_size, dat_col_list):
     '''
+    Returns a copy of data_df with moving averages of columns added as 
+    '<column>_win<win_size>'. A value is the mean of win_size rows centered 
+    at the row (see rolling_windows). 
+    NOTE: This breaks two behaviours of the old slide_window.
+        1. data_df is no longer modified in place; use the returned 
+           DataFrame. 
+        2. The mean of rows i to i+win_size-1 was written at the label 
+           i+(win_size+1)/2, i.e. at the last row of the window for odd 
+           sizes and at a new fractional label for even sizes, adding rows 
+           past the end. It is now written at row i+(win_size-1)//2 and no 
+           rows are added.
     Parameters
     ----------
     window size: int
@@ -19,19 +60,318 @@ def slide_window(data_df, win_size, dat_col_list):
     print('{} lines in the given data'.format(len(data_df.index)))
     print('Parameters\n\twindow size: {0}\n\tcolumns: {1}'.format(win_size, dat_col_list))
 
-    for col in dat_col_list:
-        new_col = '{0}_win{1}'.format(col, win_size)
+    win_df = rolling_windows(data_df, dat_col_list, [win_size], align='center')
+    res_df = data_df.copy()
+    for col in win_df.columns:
+        res_df[col] = win_df[col]
+    return res_df
+
+def rolling_windows(df, columns, win_sizes, stats=('mean',), step=1,
+                    align='left', min_count=1, skipna=True):
+    '''
+    Returns a new DataFrame of statistics of sliding windows. Sums, counts 
+    and variances are computed from cumulative sums, and min and max by the 
+    van Herk/Gil-Werman algorithm, so the cost does not depend on window 
+    sizes.
+    Parameters
+    ----------
+        df: DataFrame (pandas)
+            input data. Rows are in the order of positions.
+        columns: list
+            names of numeric columns.
+        win_sizes: list
+            window sizes (the number of rows).
+        stats: tuple
+            any of WINDOW_STATS. Output columns are '<column>_win<size>' for 
+            mean and '<column>_win<size>_<stat>' for others.
+        step: int
+            windows are computed at every step rows.
+        align: str
+            'left' (a window starts at the row), 'center' (a window is 
+            centered at the row; the left one of two centers for an even 
+            size) or 'right' (a window ends at the row).
+        min_count: int
+            the minimum number of non-NaN values in a window. Otherwise 
+            statistics are NaN. Windows exceeding the data are also NaN.
+        skipna: bool
+            if False, a window containing NaN is NaN.
+    Returns
+    -------
+        DataFrame (pandas) indexed by every step rows of df.
+    '''
+    values = df[list(columns)].to_numpy(dtype=np.float64)
+    positions = np.arange(0, len(values), step)
+    shift = window_shift(values)
+    totals = prefix_totals(values, shift, empty_totals(len(columns)))
+
+    results = {}
+    for win_size in win_sizes:
+        starts = positions - align_offset(win_size, align)
+        results[win_size] = window_stats(
+            values, totals, shift, starts, win_size, stats, min_count, skipna)
 
-        for i in range(len(data_df.index)):
-            tmp_df = data_df.loc[i:win_size+i-1]
-            data_df.loc[i+((win_size+1)/2), new_col] = tmp_df[col].mean()
+    return window_frame(results, columns, stats, df.index[positions])
+
+def iter_windows(chunks, columns, win_sizes, stats=('mean',), step=1,
+                 align='left', min_count=1, skipna=True):
+    '''
+    Yields results of rolling_windows over chunks of rows (DataFrames) as 
+    DataFrames. Rows needed by windows of the next chunk are carried over 
+    with the cumulative sums at them, so concatenated results are exactly 
+    the same as rolling_windows of all rows. Memory depends on the chunk 
+    size and the largest window size only.
+    Parameters are the same as rolling_windows.
+    '''
+    # (offset of a row in its window, rows needed after the row)
+    offsets = {w: align_offset(w, align) for w in win_sizes}
+    max_offset = max(offsets.values())
+    max_after = max(w - offsets[w] for w in win_sizes)
+
+    values = np.empty((0, len(columns)))
+    index = None
+    buf_start = 0       # Row number of values[0]
+    next_pos = 0        # Row number of the next output row
+    shift = None
+    initial = empty_totals(len(columns))
+
+    for chunk, is_last in _mark_last(chunks):
+        chunk_index = chunk.index
+        chunk = chunk[list(columns)].to_numpy(dtype=np.float64)
+        values = np.concatenate([values, chunk])
+        index = chunk_index if index is None else index.append(chunk_index)
+
+        # Rows for the shift are the same as rolling_windows
+        if shift is None:
+            if len(values) < WINDOW_SHIFT_ROWS and not is_last:
+                continue
+            shift = window_shift(values)
+
+        buf_end = buf_start + len(values)
+        end_pos = buf_end if is_last else buf_end - max_after + 1
+        positions = np.arange(next_pos, max(end_pos, next_pos), step)
+        if len(positions) == 0:
+            continue
+
+        totals = prefix_totals(values, shift, initial)
+        results = {}
+        for win_size in win_sizes:
+            starts = positions - offsets[win_size] - buf_start
+            results[win_size] = window_stats(
+                values, totals, shift, starts, win_size, stats, min_count,
+                skipna)
+        yield window_frame(results, columns, stats,
+                           index[positions - buf_start])
+
+        # Keep rows from the first window start of the next output row
+        next_pos = int(positions[-1]) + step
+        keep = min(max(next_pos - max_offset, 0), buf_end) - buf_start
+        initial = WindowTotals(*(t[keep] for t in totals))
+        values = values[keep:]
+        index = index[keep:]
+        buf_start += keep
+
+def read_track(track_path, columns=None, chunksize=WINDOW_CHUNK_SIZE, sep=','):
+    '''
+    Yields chunks of rows of a track as DataFrames.
+    Parameters
+    ----------
+        track_path: str
+            a CSV file (read with sep) or a NumPy binary file ('.npy') of an 
+            array of rows (x columns), which is memory-mapped.
+        columns: list
+            columns read from a CSV file (all columns if None), or names of 
+            columns of a NumPy array (defaults are 'value' for a 1D array 
+            and 'value0', 'value1', ... for a 2D array).
+        chunksize: int
+            the number of rows of a chunk.
+    '''
+    if not track_path.endswith('.npy'):
+        yield from pd.read_csv(track_path, sep=sep, usecols=columns,
+                               chunksize=chunksize)
+        return
+
+    array = np.load(track_path, mmap_mode='r')
+    if array.ndim == 1:
+        array = array[:, None]
+        names = ['value']
+    else:
+        names = ['value{}'.format(i) for i in range(array.shape[1])]
+    if columns is not None:
+        assert len(columns) == len(names), \
+            'The number of columns is not the same as the array.'
+        names = list(columns)
+
+    for start in range(0, len(array), chunksize):
+        chunk = np.asarray(array[start:start + chunksize])
+        yield pd.DataFrame(chunk, columns=names,
+                           index=pd.RangeIndex(start, start + len(chunk)))
+
+def stream_windows(track_path, out_path, columns, win_sizes, stats=('mean',),
+                   step=1, align='left', min_count=1, skipna=True,
+                   chunksize=WINDOW_CHUNK_SIZE, sep=','):
+    '''
+    Writes statistics of sliding windows of a track larger than memory to a 
+    CSV file (out_path) chunk by chunk. The output is the same as 
+    rolling_windows of the whole track written by to_csv. Returns the 
+    number of written rows.
+    Parameters
+    ----------
+        track_path: str
+            a CSV or '.npy' file (see read_track).
+        columns: list
+            names of columns for statistics (see read_track for '.npy').
+        Others are the same as rolling_windows and read_track.
+    '''
+    chunks = read_track(track_path, columns, chunksize, sep)
+    row_num = 0
+    with open(out_path, 'w') as f:
+        for win_df in iter_windows(chunks, columns, win_sizes, stats, step,
+                                   align, min_count, skipna):
+            win_df.to_csv(f, sep=sep, header=row_num == 0)
+            row_num += len(win_df)
+    return row_num
+
+def window_shift(values):
+    '''Returns the first non-NaN value of each column within the first 
+    WINDOW_SHIFT_ROWS rows (0 if none). '''
+    head = values[:WINDOW_SHIFT_ROWS]
+    valid = ~np.isnan(head)
+    first = valid.argmax(axis=0)
+    shift = head[first, np.arange(head.shape[1])] if len(head) > 0 \
+        else np.zeros(values.shape[1])
+    return np.where(valid.any(axis=0), shift, 0.0)
+
+def empty_totals(column_num):
+    '''Returns WindowTotals at the first row. '''
+    return WindowTotals(np.zeros(column_num), np.zeros(column_num),
+                        np.zeros(column_num, dtype=np.int64))
+
+def prefix_totals(values, shift, initial):
+    '''Returns WindowTotals of rows 0 to len(values) continuing from initial 
+    totals (row 0 is initial). Giving the totals at the end of previous rows 
+    as initial results in the same sums as computed over all rows at once. 
+    '''
+    valid = ~np.isnan(values)
+    shifted = np.where(valid, values - shift, 0.0)
+    return WindowTotals(
+        np.cumsum(np.vstack([initial.sums, shifted]), axis=0),
+        np.cumsum(np.vstack([initial.squares, shifted * shifted]), axis=0),
+        np.cumsum(np.vstack([initial.counts, valid]), axis=0))
+
+def align_offset(win_size, align):
+    '''Returns the position of a row within its window. '''
+    if align == 'left':
+        return 0
+    if align == 'center':
+        return (win_size - 1) // 2
+    if align == 'right':
+        return win_size - 1
+    raise ValueError(f'Unknown align: {align}')
+
+def window_stats(values, totals, shift, starts, win_size, stats,
+                 min_count=1, skipna=True):
+    '''
+    Returns a dictionary of statistics (arrays of len(starts) x columns) of 
+    windows starting at starts (row numbers of values). totals are given by 
+    prefix_totals(values, ...). Windows exceeding values are NaN.
+    '''
+    for stat in stats:
+        if stat not in WINDOW_STATS:
+            raise ValueError(f'Unknown statistic: {stat}')
+
+    column_num = values.shape[1]
+    inside = (starts >= 0) & (starts + win_size <= len(values))
+    s = starts[inside]
+    e = s + win_size
+
+    counts = totals.counts[e] - totals.counts[s]
+    sums = totals.sums[e] - totals.sums[s]
+    invalid = counts < max(min_count, 1)
+    if not skipna:
+        invalid |= counts < win_size
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        window_values = {'count': counts.astype(np.float64)}
+        if 'mean' in stats:
+            window_values['mean'] = sums / counts + shift
+        if 'sum' in stats:
+            window_values['sum'] = sums + counts * shift
+        if 'var' in stats or 'std' in stats:
+            squares = totals.squares[e] - totals.squares[s]
+            var = np.maximum(squares - sums * sums / counts, 0.0) / (counts - 1)
+            var[counts < 2] = np.nan
+            window_values['var'] = var
+            window_values['std'] = np.sqrt(var)
+    if 'max' in stats:
+        window_values['max'] = _sliding_extreme(
+            values, win_size, np.maximum, -np.inf)[s]
+    if 'min' in stats:
+        window_values['min'] = _sliding_extreme(
+            values, win_size, np.minimum, np.inf)[s]
+
+    results = {}
+    for stat in stats:
+        result = np.full((len(starts), column_num), np.nan)
+        window_value = window_values[stat]
+        if stat != 'count':
+            window_value = np.where(invalid, np.nan, window_value)
+        result[inside] = window_value
+        results[stat] = result
+    return results
+
+def window_frame(results, columns, stats, index):
+    '''Returns a DataFrame of results of window_stats of each window size. '''
+    data = {}
+    for i, col in enumerate(columns):
+        for win_size, win_results in results.items():
+            for stat in stats:
+                name = '{0}_win{1}'.format(col, win_size)
+                if stat != 'mean':
+                    name += '_' + stat
+                data[name] = win_results[stat][:, i]
+    return pd.DataFrame(data, index=index)
+
+def _sliding_extreme(values, win_size, ufunc, fill):
+    '''Returns maxima (ufunc=np.maximum) or minima (np.minimum) of windows 
+    starting at each row by the van Herk/Gil-Werman algorithm. NaN is 
+    replaced by fill.
+    '''
+    row_num, column_num = values.shape
+    if row_num < win_size:
+        return np.empty((0, column_num))
+
+    # Extremes from block starts (forward) and to block ends (backward) in 
+    # blocks of win_size rows. A window covers the end of one block and the 
+    # start of the next one.
+    block_num = -(-row_num // win_size)
+    x = np.full((block_num * win_size, column_num), fill)
+    x[:row_num] = np.where(np.isnan(values), fill, values)
+    x = x.reshape(block_num, win_size, column_num)
+    forward = ufunc.accumulate(x, axis=1).reshape(-1, column_num)
+    backward = ufunc.accumulate(x[:, ::-1], axis=1)[:, ::-1] \
+        .reshape(-1, column_num)
+
+    starts = np.arange(row_num - win_size + 1)
+    return ufunc(backward[starts], forward[starts + win_size - 1])
+
+def _mark_last(items):
+    '''Yields each item and whether it is the last one. '''
+    items = iter(items)
+    previous = next(items, None)
+    if previous is None:
+        return
+    for item in items:
+        yield previous, False
+        previous = item
+    yield previous, True
 
 def step(df, step):
     index = [i for i in range(len(df.index)) if i % step == 0]
 
     return df.loc[index, :]
 
-def count_occurrence(df, column, out_path=None, by=None, to_file=True, **kwargs):
+def count_occurrence(df, column, out_path=None, by=None, to_file=True,
+                     chunksize=None, workers=1, **kwargs):
     '''
     Returns Dataframe containing items and its occurence.
     Parameters
@@ -40,6 +380,14 @@ def count_occurrence(df, column, out_path=None, by=None, to_file=True, **kwargs)
             input data. You can give a path to comma delemited table to df.
         column: str
             a column name that you want count items in
+        by: tuple
+            (column, item) to count only rows having the item in the column.
+        chunksize: int
+            if given with a path, the table is read in chunks of this number 
+            of rows (see count_csv).
+        workers: int
+            if more than 1 with a path, chunks are counted in a process pool 
+            (see count_csv).
         **kwargs:
             will give to pd.read_csv(). Please use the same paramters as pd.read_csv() for **kwargs.
     '''
@@ -50,26 +398,373 @@ def count_occurrence(df, column, out_path=None, by=None, to_file=True, **kwargs)
         if os.path.isfile(out_path):
             raise Exception('{} already exists.'.format(out_path))
 
-    # get initial DataFrame
-    if isinstance(df, str):
-        df = pd.read_csv(df, **kwargs)
+    c = column if by is None else '{0}_{1}'.format(by[1], column)
 
-    # If "by" is specified, select items which have the key.
-    if isinstance(by, tuple):
-        dat = df[df.loc[:, by[0]] == by[1]]
-        c = '{0}_{1}'.format(by[1], column)
+    if isinstance(df, str) and (chunksize or workers > 1):
+        counts = count_csv(df, column, by, chunksize or COUNT_CHUNK_SIZE,
+                           workers, **kwargs)
     else:
-        dat = df
-        c = column
+        # get initial DataFrame
+        if isinstance(df, str):
+            df = pd.read_csv(df, **kwargs)
+        counts = _count_items(df, column, by)
 
-    # count items
-    res_df = pd.DataFrame(list(dict(Counter(dat.loc[:, column])).items()), columns=[c, 'count'])
-    if not to_file:
-        return res_df.sort_values(by=c)
-    else:
-        res_df.sort_values(by=c, inplace=True).to_csv(out_path, index=False)
+    res_df = counts.rename_axis(c).reset_index(name='count').sort_values(by=c)
+    if to_file:
+        res_df.to_csv(out_path, index=False)
         print('saved to {}'.format(out_path))
-        return res_df
+    return res_df
+
+def count_csv(csv_path, column, by=None, chunksize=COUNT_CHUNK_SIZE,
+              workers=1, **kwargs):
+    '''
+    Returns the number of rows of each item of a column of a CSV file with a 
+    header line as a Series (item -> count). Only the needed columns are read 
+    in chunks, so memory depends on chunksize and the number of items.
+    Parameters
+    ----------
+        by: tuple
+            (column, item) to count only rows having the item in the column. 
+            Rows are selected in each chunk.
+        workers: int
+            the number of processes. The file is split into byte ranges at 
+            line starts, so it must not have line breaks in quoted fields. 
+            Compressed files (detected by compression.is_compressed) are read 
+            by one process.
+        **kwargs:
+            will give to pd.read_csv() (other than header, names, usecols, 
+            dtype and chunksize).
+    Returns
+    -------
+        Series (pandas) of counts of items as strings. Items are read as 
+        strings so that the same item has the same key in all chunks.
+    '''
+    with open_input(csv_path) as f:
+        names = list(pd.read_csv(f, nrows=0, **kwargs).columns)
+    usecols = [column] if by is None else list(dict.fromkeys([column, by[0]]))
+    for col in usecols:
+        if col not in names:
+            raise KeyError(f'Column not found: {col}')
+    dtype = dict.fromkeys(usecols, str)
+    if by is not None:
+        by = (by[0], str(by[1]))
+
+    if workers > 1 and not is_compressed(csv_path):
+        # Only the first range contains the header line
+        ranges = split_file(csv_path, workers * COUNT_CHUNKS_PER_WORKER,
+                            skip_headers=1)
+        args = [(csv_path, start, end, names, usecols, dtype, column, by,
+                 chunksize, kwargs) for start, end in ranges]
+        with ProcessPoolExecutor(workers) as executor:
+            parts = list(executor.map(_count_csv_range, args))
+        return _merge_counts(parts)
+
+    with open_input(csv_path) as f:
+        reader = pd.read_csv(f, usecols=usecols, dtype=dtype,
+                             chunksize=chunksize, **kwargs)
+        return _count_chunks(reader, column, by)
+
+def _count_items(df, column, by):
+    '''Returns counts of items of a column of rows of df selected by by. '''
+    if by is not None:
+        df = df[df[by[0]] == by[1]]
+    return df[column].value_counts(sort=False, dropna=False)
+
+def _merge_counts(parts):
+    '''Returns the sum of counts of items (Series). '''
+    counts = pd.concat(parts)
+    return counts.groupby(level=0, sort=False, dropna=False).sum() \
+        .astype(np.int64)
+
+def _count_chunks(chunks, column, by):
+    '''Counts items in chunks (DataFrames) merging counts of each chunk. '''
+    counts = pd.Series([], dtype=np.int64)
+    for chunk in chunks:
+        counts = _merge_counts([counts, _count_items(chunk, column, by)])
+    return counts
+
+def _count_csv_range(args):
+    '''Counts items in a byte range of a CSV file. '''
+    csv_path, start, end, names, usecols, dtype, column, by, chunksize, \
+        kwargs = args
+
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        reader = pd.read_csv(
+            io.BufferedReader(_RangeReader(f, end - start)),
+            header=0 if start == 0 else None, names=names, usecols=usecols,
+            dtype=dtype, chunksize=chunksize, **kwargs)
+        return _count_chunks(reader, column, by)
+
+class _RangeReader(io.RawIOBase):
+    '''Raw reader of the next size bytes of a binary file. '''
+    def __init__(self, f, size):
+        self._f = f
+        self._remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._f.readinto(memoryview(b)[:min(len(b), self._remaining)])
+        self._remaining -= n
+        return n
+
+# Pattern of a comparison of search_items_df
+QUERY_COMPARISON = re.compile(r'^(gte|gt|lte|lt|ne)(-?\d+\.*\d*)$')
+QUERY_CONTAINS = re.compile(r'^(n?c)/(.+)/$')
+
+class QueryPlan:
+    '''
+    Conditions of search_items_df compiled by compile_query. Conditions are 
+    evaluated as boolean masks over the original frame and rows are sliced 
+    once at the end. The same plan can be applied to many frames.
+    How-to-use
+    ----------
+    plan = compile_query(A='gte100', B=('c/ab/', 'ne3'))
+    res_df = plan.apply(df)
+    '''
+    def __init__(self, conditions):
+        '''conditions is a list of (column, node). A node is (operator, 
+        value), ('and', [nodes]) or ('or', [nodes]). '''
+        self.conditions = conditions
+
+    @property
+    def columns(self):
+        return [k for k, _ in self.conditions]
+
+    def check_columns(self, df):
+        '''Raises KeyError if df does not have a column of conditions. '''
+        missing = [k for k in self.columns if k not in df.columns]
+        if len(missing) > 0:
+            raise KeyError(f'Columns not found: {missing}')
+
+    def rows(self, df, indexes):
+        '''
+        Returns positions of rows of df satisfying all conditions in 
+        ascending order, looking up conditions supported by indexes (a 
+        dictionary of HashIndex or SortedIndex of columns of df) first. 
+        Other conditions are evaluated only over the found rows.
+        '''
+        self.check_columns(df)
+        rows = None
+        others = []
+        for k, node in self.conditions:
+            found = indexes[k].lookup(node) if k in indexes else None
+            if found is None:
+                others.append((k, node))
+            elif rows is None:
+                rows = found
+            else:
+                rows = np.intersect1d(rows, found, assume_unique=True)
+
+        if rows is None:
+            return np.flatnonzero(self.mask(df))
+        for k, node in sorted(others, key=lambda c: _has_contains(c[1])):
+            rows = rows[_eval_query_node(df[k].iloc[rows], node)]
+        return rows
+
+    def mask(self, df):
+        '''Returns a boolean array of rows of df satisfying all conditions. '''
+        self.check_columns(df)
+        mask = np.ones(len(df.index), dtype=bool)
+        # String matching is slow, so it is evaluated after other conditions
+        # only over rows satisfying them
+        conditions = sorted(self.conditions, key=lambda c: _has_contains(c[1]))
+        for k, node in conditions:
+            if mask.all():
+                mask &= _eval_query_node(df[k], node)
+            else:
+                rows = np.flatnonzero(mask)
+                mask[rows] = _eval_query_node(df[k].iloc[rows], node)
+        return mask
+
+    def apply(self, df, indexes=None):
+        '''Returns rows of df satisfying all conditions. indexes are used 
+        if given (see rows). '''
+        if len(self.conditions) == 0:
+            self.check_columns(df)
+            return df
+        if indexes:
+            return df.iloc[self.rows(df, indexes)]
+        return df[self.mask(df)]
+
+    def __repr__(self):
+        return '<{name}: {conditions}>'.format(
+            name=type(self).__name__, conditions=self.conditions)
+
+class HashIndex:
+    '''
+    Positions of rows of each value of a column for "==" conditions of 
+    QueryPlan. NaN is not indexed because it is not equal to any value.
+    '''
+    def __init__(self, column):
+        codes, uniques = pd.factorize(column)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self._rows = {value: order[bounds[i]:bounds[i + 1]]
+                      for i, value in enumerate(uniques)}
+
+    def lookup(self, node):
+        '''Returns positions of rows of a node ("==" or "or" of "=="), or 
+        None if the node is not supported. '''
+        op, v = node
+        if op == '==':
+            try:
+                return self._rows.get(v, np.array([], dtype=np.int64))
+            except TypeError: # Unhashable value
+                return None
+        if op == 'or':
+            found = [self.lookup(child) for child in v]
+            if any(rows is None for rows in found):
+                return None
+            return np.unique(np.concatenate(found + [np.array([], dtype=np.int64)]))
+        return None
+
+class SortedIndex:
+    '''
+    Values of a column in ascending order and their positions for "==" and 
+    comparisons ("gt", "gte", "lt", "lte" and "and" of them) of QueryPlan.
+    '''
+    def __init__(self, column):
+        values = column.to_numpy()
+        # Null values (NaN and None) do not satisfy conditions
+        rows = np.flatnonzero(~pd.isna(values))
+        values = values[rows]
+        try:
+            order = np.argsort(values, kind='stable')
+        except TypeError:
+            # Values of different types cannot be ordered, so conditions are 
+            # evaluated by QueryPlan.mask
+            self._values = None
+            return
+        self._values = values[order]
+        self._order = rows[order]
+
+    def lookup(self, node):
+        '''Returns positions of rows of a node in ascending order, or None 
+        if the node is not supported. '''
+        if self._values is None:
+            return None
+        try:
+            bounds = self._bounds(node)
+        except TypeError:
+            # A value cannot be compared with values of the column
+            return None
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        return np.sort(self._order[lo:max(lo, hi)])
+
+    def _bounds(self, node):
+        op, v = node
+        values = self._values
+        if op == 'and':
+            lo, hi = 0, len(values)
+            for child in v:
+                bounds = self._bounds(child)
+                if bounds is None:
+                    return None
+                lo, hi = max(lo, bounds[0]), min(hi, bounds[1])
+            return lo, hi
+        if op == '==':
+            return (np.searchsorted(values, v, side='left'),
+                    np.searchsorted(values, v, side='right'))
+        if op == 'gt':
+            return np.searchsorted(values, v, side='right'), len(values)
+        if op == 'gte':
+            return np.searchsorted(values, v, side='left'), len(values)
+        if op == 'lt':
+            return 0, np.searchsorted(values, v, side='left')
+        if op == 'lte':
+            return 0, np.searchsorted(values, v, side='right')
+        return None
+
+# Index classes of Database.create_index
+INDEX_TYPES = {'hash': HashIndex, 'sorted': SortedIndex}
+
+def compile_query(**kwargs):
+    '''
+    Parses conditions of search_items_df into a QueryPlan.
+    Paramters
+    ---------
+        **kwargs:
+            key is for column, value is for filtering values (items)
+            (see search_items_df). A tuple of values is "and" and a list of 
+            values is "or". A value other than str is compared by "==". 
+            Rows of "or" keep the original order without duplicates.
+    '''
+    conditions = []
+    for k, v in kwargs.items():
+        node = _compile_query_value(v)
+        if node is not None:
+            conditions.append((k, node))
+    return QueryPlan(conditions)
+
+def _compile_query_value(v):
+    '''Returns a node of a value of a condition (None for any items). '''
+    if isinstance(v, (tuple, list)):
+        nodes = [_compile_query_value(i) for i in v]
+        if isinstance(v, tuple):
+            # Any items do not change "and"
+            nodes = [node for node in nodes if node is not None]
+            return ('and', nodes) if len(nodes) > 0 else None
+        # Any items match all rows in "or"
+        return None if any(node is None for node in nodes) else ('or', nodes)
+
+    if not isinstance(v, str):
+        return ('==', v)
+    if v == '*':
+        return None
+
+    m = QUERY_COMPARISON.search(v)
+    if m:
+        return (m.group(1), float(m.group(2)))
+    m = QUERY_CONTAINS.search(v)
+    if m:
+        return (m.group(1), m.group(2))
+    if re.search(r'^(gte?|lte?|ne)\d', v):
+        raise ValueError(f'Invalid number in a condition: {v}')
+    return ('==', v)
+
+def _has_contains(node):
+    '''Returns True if a node has string matching. '''
+    op, v = node
+    if op in ('and', 'or'):
+        return any(_has_contains(child) for child in v)
+    return op in ('c', 'nc')
+
+def _eval_query_node(column, node):
+    '''Returns a boolean array of a node over a column (Series). '''
+    op, v = node
+    if op == 'and':
+        mask = np.ones(len(column), dtype=bool)
+        for child in v:
+            mask &= _eval_query_node(column, child)
+        return mask
+    if op == 'or':
+        mask = np.zeros(len(column), dtype=bool)
+        for child in v:
+            mask |= _eval_query_node(column, child)
+        return mask
+
+    if op == 'c':
+        res = column.str.contains(v, na=False)
+    elif op == 'nc':
+        res = ~column.str.contains(v, na=True)
+    elif op == 'gt':
+        res = column > v
+    elif op == 'gte':
+        res = column >= v
+    elif op == 'lt':
+        res = column < v
+    elif op == 'lte':
+        res = column <= v
+    elif op == 'ne':
+        res = column != v
+    else:
+        res = column == v
+    return res.to_numpy(dtype=bool, na_value=False)
 
 def search_items_df(df, **kwargs):
     '''
@@ -78,6 +773,8 @@ def search_items_df(df, **kwargs):
     For example, if you want to get items that is greater than equal (>=)
     100 in column "A", please specify **kwargs as "A=gte100". Please see below for details.
     If nothing passed to **kwargs, return input dataframe.
+    Conditions are compiled by compile_query. Please use the QueryPlan to 
+    apply the same conditions to many frames.
     Paramters
     ---------
         df: DataFrame (pandas)
@@ -91,46 +788,16 @@ def search_items_df(df, **kwargs):
             "lte" for "<="
             "ne" for "!="
             "c/" for "contains"
+            "nc/" for "not contains"
             "" for "=="
             If you pass tuple to value, this function search and filter items recursively.
+            If you pass list to value, rows matching any of the items are returned.
+            NOTE: Rows of a list ("or") are returned once in the original 
+            order of df. Database.filter used to return rows of each item 
+            one after another, so a row matching several items was repeated 
+            (e.g. GeneticCode.codons(aa1=['L', 'F'])).
     '''
-    res_df = df
-
-    def f(res_df, k, v):
-        if v == '*':
-            pass
-        elif re.search('^gt\d+', v):
-            v = float(re.search('^gt(\d+\.*\d*)$', v).group(1))
-            res_df = res_df[res_df[k] > v]
-        elif re.search('^gte\d+', v):
-            v = float(re.search('^gte(\d+\.*\d*)$', v).group(1))
-            res_df = res_df[res_df[k] >= v]
-        elif re.search('^lt\d+', v):
-            v = float(re.search('^lt(\d+\.*\d*)$', v).group(1))
-            res_df = res_df[res_df[k] < v]
-        elif re.search('^lte\d+', v):
-            v = float(re.search('lte(\d+\.*\d*)$', v).group(1))
-            res_df = res_df[res_df[k] <= v]
-        elif re.search('^ne\d+', v):
-            v = float(re.search('ne(\d+\.*\d*)$', v).group(1))
-            res_df = res_df[res_df[k] != v]
-        elif re.search('^c\/', v):
-            v = re.search('^c\/(.+)\/$', v).group(1)
-            res_df = res_df[res_df[k].str.contains(v)]
-        else:
-            res_df = res_df[res_df[k] == v]
-        return res_df
-
-    for k,v in kwargs.items():
-        if isinstance(v, tuple):
-            for i in v:
-                res_df = f(res_df, k, i)
-        elif isinstance(v, str):
-            res_df = f(res_df, k, v)
-        elif isinstance(v, int):
-            res_df = res_df[res_df[k] == v]
-
-    return res_df
+    return compile_query(**kwargs).apply(df)
 
 def adjust_average(data, average=1000, divisor=None, integer=False):
 
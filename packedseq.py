@@ -0,0 +1,189 @@
+""" Nucleotide sequences packed into 2 bits per base. Bases are encoded in
+the order of constants.BASES (T: 0, C: 1, A: 2, G: 3). Any other character
+(e.g., N, other IUPAC codes, gaps or lower-case bases) is kept in a side table
+of positions and characters, so decoding always returns the original string.
+"""
+
+import numpy as np
+
+from typing import Dict, Union
+
+from .constants import BASES
+
+# Code of each byte value. 255 means that the byte is not one of BASES.
+_ENCODE = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _ENCODE[ord(_base)] = _code
+
+_DECODE = np.frombuffer(''.join(BASES).encode('ascii'), dtype=np.uint8)
+
+# Bit shifts of 4 bases in one byte (the first base in the highest bits)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+# The number of each code in each byte value of packed data (256 x 4)
+_CODE_COUNTS = np.stack([
+    ((np.arange(256)[:, None] >> _SHIFTS) & 3 == code).sum(axis=1)
+    for code in range(len(BASES))
+], axis=1)
+
+class PackedSeq:
+    """Represents a nucleotide sequence with 2 bits per base.
+
+    Attributes
+    ----------
+    packed: np.ndarray (uint8)
+        4 bases per byte. Ambiguous positions hold the code 0.
+    ambiguous_positions: np.ndarray (int64)
+        Sorted positions of characters that are not one of BASES.
+    ambiguous_chars: np.ndarray (uint8)
+        ASCII codes of the characters at ambiguous_positions.
+
+    How-to-use
+    ----------
+    seq = PackedSeq.from_str('ATGNNCCA')
+    len(seq)            -> 8
+    str(seq[2:6])       -> 'GNNC'
+    seq.count_bases()   -> {'T': 1, 'C': 2, 'A': 2, 'G': 1, 'N': 2}
+    """
+    __slots__ = ('packed', 'ambiguous_positions', 'ambiguous_chars', '_length')
+
+    def __init__(self,
+            packed:                 np.ndarray,
+            length:                 int,
+            ambiguous_positions:    np.ndarray = None,
+            ambiguous_chars:        np.ndarray = None
+            ) -> None:
+        if ambiguous_positions is None:
+            ambiguous_positions = np.array([], dtype=np.int64)
+        if ambiguous_chars is None:
+            ambiguous_chars = np.array([], dtype=np.uint8)
+
+        assert len(packed) == (length + 3) // 4, 'Wrong size of packed data.'
+        assert len(ambiguous_positions) == len(ambiguous_chars)
+
+        self.packed = packed
+        self.ambiguous_positions = ambiguous_positions
+        self.ambiguous_chars = ambiguous_chars
+        self._length = length
+
+    @classmethod
+    def from_str(cls, seq: str) -> 'PackedSeq':
+        """Creates PackedSeq from a string of ASCII characters. """
+        return cls.from_bytes(seq.encode('ascii'))
+
+    @classmethod
+    def from_bytes(cls, seq: bytes) -> 'PackedSeq':
+        """Creates PackedSeq from ASCII bytes. """
+        chars = np.frombuffer(seq, dtype=np.uint8)
+        codes = _ENCODE[chars]
+
+        ambiguous = codes == 255
+        ambiguous_positions = np.flatnonzero(ambiguous)
+        ambiguous_chars = chars[ambiguous_positions]
+        codes[ambiguous] = 0
+
+        return cls(_pack_codes(codes), len(codes),
+                   ambiguous_positions, ambiguous_chars)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Boolean array that is True at ambiguous positions. """
+        mask = np.zeros(self._length, dtype=bool)
+        mask[self.ambiguous_positions] = True
+        return mask
+
+    def codes(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Returns codes (0-3 in the order of BASES) of bases from start to
+        end. Ambiguous positions have the code 0.
+        """
+        if end is None:
+            end = self._length
+        if end <= start:
+            return np.array([], dtype=np.uint8)
+
+        # Unpack only bytes containing the range
+        first_byte = start // 4
+        codes = (self.packed[first_byte:(end + 3) // 4, None] >> _SHIFTS) & 3
+        offset = start - first_byte * 4
+        return codes.ravel()[offset:offset + end - start]
+
+    def decode(self) -> str:
+        """Returns the original string. """
+        return self._decode_range(0, self._length)
+
+    def count_bases(self) -> Dict[str, int]:
+        """Returns the number of each base. Ambiguous characters are counted
+        separately.
+        """
+        # Count codes of each byte value instead of unpacking all bases
+        byte_counts = np.bincount(self.packed, minlength=256)
+        counts = byte_counts @ _CODE_COUNTS
+
+        # Padding of the last byte and ambiguous positions have the code 0
+        counts[0] -= len(self.packed) * 4 - self._length
+        counts[0] -= len(self.ambiguous_positions)
+
+        base_counts = {base: int(n) for base, n in zip(BASES, counts)}
+        chars, char_counts = np.unique(self.ambiguous_chars, return_counts=True)
+        for char, n in zip(chars, char_counts):
+            base_counts[chr(char)] = int(n)
+
+        return base_counts
+
+    def _decode_range(self, start, end):
+        chars = _DECODE[self.codes(start, end)]
+        lo, hi = np.searchsorted(self.ambiguous_positions, [start, end])
+        chars[self.ambiguous_positions[lo:hi] - start] = \
+            self.ambiguous_chars[lo:hi]
+        return chars.tobytes().decode('ascii')
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, 'PackedSeq']:
+        if isinstance(key, slice):
+            start, end, step = key.indices(self._length)
+            if step != 1:
+                return PackedSeq.from_str(self.decode()[key])
+
+            end = max(start, end)
+            lo, hi = np.searchsorted(self.ambiguous_positions, [start, end])
+            return PackedSeq(
+                _pack_codes(self.codes(start, end)), end - start,
+                self.ambiguous_positions[lo:hi] - start,
+                self.ambiguous_chars[lo:hi])
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError('PackedSeq index out of range')
+        return self._decode_range(key, key + 1)
+
+    def __str__(self) -> str:
+        return self.decode()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedSeq):
+            return self._length == other._length \
+                and np.array_equal(self.packed, other.packed) \
+                and np.array_equal(
+                    self.ambiguous_positions, other.ambiguous_positions) \
+                and np.array_equal(self.ambiguous_chars, other.ambiguous_chars)
+        if isinstance(other, str):
+            return self.decode() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        if self._length > 20:
+            return f'{class_name}({self._decode_range(0, 20)}... ' \
+                   f'({self._length} bases))'
+        return f'{class_name}({self.decode()})'
+
+def _pack_codes(codes: np.ndarray) -> np.ndarray:
+    """Packs codes (0-3) into bytes of 4 codes. """
+    padded = np.zeros((len(codes) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(codes)] = codes
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) \
+        | quads[:, 3]
@@ -3,11 +3,29 @@ takes a file path as input and output an object (object types depend on data
 types). 
 """
 
+import os
+import json
 from warnings import warn
-from typing import List, Dict, Union, Callable, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Union, Callable, Any, Iterator, Iterable, \
+    Tuple, Optional, Set
 
-from .text import get_itemnum, do_nothing
+import numpy as np
+from numpy.typing import DTypeLike
+
+from .text import get_itemnum, do_nothing, _concatenate_arrays
 from .check import check_item_number, check_item_divisor
+from .cache import ParseCache
+from .compression import open_input, is_compressed, check_not_compressed
+from .packedseq import PackedSeq
+from .linescan import LineScanner, HEADER, ITEMNUM, DIVISOR, VALUES, \
+    strip_line_end, split_file
+
+INDEX_SUFFIX = '.idx'
+# The first line of an index file records the indexed file and options
+INDEX_HEADER_PREFIX = '#index:'
+# The number of byte ranges per process when parsing in parallel
+CHUNKS_PER_WORKER = 4
 
 # =============== Primary Functions [start] =============== #
 
@@ -18,11 +36,18 @@ def read_1D_list(
         apply_func      : Callable[[str], Any] = do_nothing, 
         skip_empty_lines: bool = True,
         skip_headers    : int = 0, 
-        header_parser   : Callable[[List[str]], Any] = do_nothing
+        header_parser   : Callable[[List[str]], Any] = do_nothing,
+        workers         : int = 1,
+        dtype           : Optional[DTypeLike] = None,
+        cache           : Optional[ParseCache] = None,
+        cache_key       : str = ''
         # cut_inline_comment = False # TODO: Implement in the future
         ) -> List[Any]:
     """Read a plain-text file containing 1D list data. 
 
+    Compressed files (gzip, BGZF and Zstandard) are decompressed while being 
+    read. 
+
     The expected number of items is read from a line starting with 'itemnum:'. 
     If such line does not exist, this function does not item number checking. 
 
@@ -36,62 +61,45 @@ def read_1D_list(
         Function applied to each of value lines.
     skip_empty_lines: bool, optional (default: True)
         Whether to skip empty lines. 
+    workers: int, optional (default: 1)
+        The number of processes. If more than 1, the file is split into byte 
+        ranges starting at line starts and the ranges are parsed in a process 
+        pool. apply_func and header_parser must be picklable (e.g., not a 
+        lambda) in this case. A compressed file is read by one process. 
+    dtype: DTypeLike, optional (default: None)
+        NumPy data type of items (e.g., 'int64' or 'float64'). If given, value 
+        lines are converted in bulk and a NumPy array is returned instead of a 
+        list. apply_func cannot be used together. 
+    cache: cache.ParseCache, optional (default: None)
+        If given, the result is loaded from the cache if exists, otherwise 
+        stored in the cache. 
+    cache_key: str, optional (default: '')
+        String identifying apply_func and header_parser in the cache. 
+        Required if cache is given with non-default functions. 
 
     Return
     ------
     List[Any]
         List containing each line in the input file as an element. Elements in 
         the list may not be string object depending on apply_func argument. 
+        NumPy array if dtype is given. 
     """
-    # Initialize a list that will be returned from this function
-    items: List[str] = []
-    exp_itemnum = None
-    line_count = 0
-    header_lines = []
+    if cache is not None:
+        return _load_from_cache(read_1D_list, cache, cache_key, locals())
 
-    # Open the input file by a read mode
-    with open(file_path, 'r') as f:
-        # For each line
-        for l in f:
-            # Remove empty characters (e.g., space, tab or next line) on both 
-            # left and right ends
-            line = l.rstrip('\n')
-
-            # If a line is empty
-            if line == '':
-                # If skip_empty_lines option is True
-                if skip_empty_lines:
-                    # Go to the next line
-                    continue
-            else:
-                line_count += 1
-
-                if line_count <= skip_headers:
-                    header_lines.append(line)
-                    continue
-
-            # If a line starts with 'itemnum:'
-            if itemnum == 'infer':
-                if line.startswith('itemnum:'):
-                    # Get the expected number of items
-                    exp_itemnum = get_itemnum(line)
-                    # Go to the next line
-                    continue
-
-            elif isinstance(itemnum, int):
-                exp_itemnum = itemnum                
-
-            # Check if this a comment line
-            full_line_comment = [
-                comment # Character indicating that this is a comment line 
-                for comment in comments if line.startswith(comment)
-            ]
-            # If a line starts with one of the comment, 
-            if len(full_line_comment) > 0:
-                # Go to the next line
-                continue
+    if dtype is not None and apply_func is not do_nothing:
+        raise ValueError('apply_func cannot be used together with dtype.')
 
-            items.append(apply_func(line))
+    if workers > 1 and _check_splittable(file_path):
+        items, exp_itemnum, header_lines = _read_1D_list_parallel(
+            file_path, comments, itemnum, apply_func, skip_empty_lines, 
+            skip_headers, dtype, workers)
+    else:
+        # Open the input file by a binary read mode
+        with open_input(file_path) as f:
+            items, exp_itemnum, header_lines = _parse_1D_file(
+                f, comments, itemnum, apply_func, skip_empty_lines, 
+                skip_headers, dtype)
 
     if exp_itemnum != None:
         # Raise Assertion error if the observed number of items is different 
@@ -114,13 +122,21 @@ def read_2D_list(
         include_key_order   : bool = False,
         skip_headers        : int = 0, 
         skip_empty_lines    : bool = True, 
-        read_values         : bool = True
+        read_values         : bool = True,
+        workers             : int = 1,
+        keys                : Optional[Set[str]] = None,
+        key_predicate       : Optional[Callable[[str], bool]] = None,
+        unique_keys         : bool = False,
+        packed              : bool = False,
+        cache               : Optional[ParseCache] = None,
+        cache_key           : str = ''
         # cut_inline_comment = False # TODO: Implement in the future
         ) -> Dict[str, Union[str, List[Any]]]:
     """Read a plain-text file containing 2D list data. 
 
     This function requires a string specifies a division of items (item_divisor). 
-    itemnum can be included. 
+    itemnum can be included. Compressed files (gzip, BGZF and Zstandard) are 
+    decompressed while being read. 
 
     Parameters
     ----------
@@ -145,108 +161,647 @@ def read_2D_list(
     read_values: bool, optional (default: True)
         Whether to read non-key lines (e.g., nucleotide sequences in FASTA file).
         If a user wants to get only sequence IDs, set read_values = False. 
+    workers: int, optional (default: 1)
+        The number of processes. If more than 1, the file is split into byte 
+        ranges starting at item_divisor lines and the ranges are parsed in a 
+        process pool. apply_func and key_predicate must be picklable (e.g., 
+        not a lambda) in this case. A compressed file is read by one process. 
+    keys: Set[str], optional (default: None)
+        Keys of items to be read. Value lines of the other items are skipped 
+        without applying apply_func. If None, all items are read. 
+    key_predicate: Callable[[str], bool], optional (default: None)
+        Function that returns True for keys of items to be read. If both keys 
+        and key_predicate are given, an item must satisfy both. 
+    unique_keys: bool, optional (default: False)
+        Whether each key appears only once in the file. If True and keys is 
+        given, reading stops as soon as all the keys are read. 
+    packed: bool, optional (default: False)
+        Whether to store each value as packedseq.PackedSeq (2 bits per base). 
+        Requires join_value_lines = True. 
+    cache: cache.ParseCache, optional (default: None)
+        If given, the result is loaded from the cache if exists, otherwise 
+        stored in the cache. 
+    cache_key: str, optional (default: '')
+        String identifying apply_func and key_predicate in the cache. 
+        Required if cache is given with non-default functions. 
 
     Return
     ------
     Dict[str, Union[str, List[Any]]]
         Dictionary of items. A string following to item_divisor is a key and 
         lines until the next item_divisor is stored as value. 
+
+    Note
+    ----
+    The number of items is not checked against 'itemnum:' when items are 
+    selected by keys or key_predicate. 
     """
-    
-    # Initialize a list that will be returned from this function
-    items: Dict[str, List[str]] = {}
-    key = ''
-    key_id = 0
-    value = []
-    exp_itemnum = None
-    line_count = 0
+    if cache is not None:
+        return _load_from_cache(read_2D_list, cache, cache_key, locals())
 
     # Check if item_divisor is a string and is not empty. 
     check_item_divisor(item_divisor)
+    _check_packed_option(packed, join_value_lines)
 
-    # Open the input file by a read mode
-    with open(file_path, 'r') as f:
-        # For each line
+    if workers > 1 and _check_splittable(file_path):
+        items, exp_itemnum = _read_2D_list_parallel(
+            file_path, item_divisor, comments, apply_func, join_value_lines, 
+            include_key_order, skip_headers, skip_empty_lines, read_values, 
+            keys, key_predicate, unique_keys, packed, workers)
+    else:
+        # Open the input file by a binary read mode
+        with open_input(file_path) as f:
+            records = _parse_2D_file(
+                f, item_divisor, comments, apply_func, join_value_lines, 
+                include_key_order, skip_headers, skip_empty_lines, read_values, 
+                keys, key_predicate, unique_keys, packed)
+            # Collect all items into a dictionary. The generator returns the 
+            # expected number of items when it is exhausted. 
+            items, exp_itemnum = _collect_2D_items(records)
+
+    if exp_itemnum != None and keys is None and key_predicate is None:
+        # Raise Assertion error if the observed number of items is different 
+        # from the expected. 
+        check_item_number(len(items), exp_itemnum)
+
+    return items
+
+def iter_2D_list(
+        file_path           : str, 
+        item_divisor        : str = '>',
+        comments            : List[str] = ['/*', '#'], 
+        apply_func          : Callable[[str], Any] = do_nothing, 
+        join_value_lines    : bool = False,
+        include_key_order   : bool = False,
+        skip_headers        : int = 0, 
+        skip_empty_lines    : bool = True, 
+        read_values         : bool = True,
+        keys                : Optional[Set[str]] = None,
+        key_predicate       : Optional[Callable[[str], bool]] = None,
+        unique_keys         : bool = False,
+        packed              : bool = False
+        ) -> Iterator[Tuple[str, Union[str, List[Any]]]]:
+    """Read a plain-text file containing 2D list data one item at a time. 
+
+    This is a generator version of read_2D_list. Only one item is kept in 
+    memory at a time, so this can be used for files that are too large to be 
+    read as a dictionary. Options are the same as read_2D_list. 
+
+    If an 'itemnum:' line is found, the number of yielded items is checked 
+    after the last item is yielded unless items are selected by keys or 
+    key_predicate. Note that this counts every item in the file while 
+    read_2D_list counts unique keys. 
+
+    Return
+    ------
+    Iterator[Tuple[str, Union[str, List[Any]]]]
+        (key, value) pairs in the order of the input file. 
+    """
+    # Check if item_divisor is a string and is not empty. 
+    check_item_divisor(item_divisor)
+    _check_packed_option(packed, join_value_lines)
+
+    with open_input(file_path) as f:
+        records = _parse_2D_file(
+            f, item_divisor, comments, apply_func, join_value_lines, 
+            include_key_order, skip_headers, skip_empty_lines, read_values, 
+            keys, key_predicate, unique_keys, packed)
+        item_count = 0
+
+        while True:
+            try:
+                key, value = next(records)
+            except StopIteration as stop:
+                exp_itemnum, _ = stop.value
+                break
+
+            item_count += 1
+            yield key, value
+
+    if exp_itemnum != None and keys is None and key_predicate is None:
+        # Raise Assertion error if the observed number of items is different 
+        # from the expected. 
+        check_item_number(item_count, exp_itemnum)
+
+def build_2D_index(
+        file_path           : str, 
+        item_divisor        : str = '>',
+        comments            : List[str] = ['/*', '#'], 
+        skip_headers        : int = 0, 
+        index_path          : str = ''
+        ) -> Dict[str, Tuple[int, int]]:
+    """Build a byte-offset index of a 2D list file and save it as a sidecar 
+    file. 
+
+    The index is similar to a FASTA index (.fai) of samtools, but any 
+    item_divisor can be used. Each line of the index file contains a key, 
+    the byte offset of the line starting with item_divisor and the length of 
+    the item in bytes (tab separated). The first line records the size and 
+    the modification time (st_mtime_ns) of the indexed file to detect a stale 
+    index, and item_divisor, comments and skip_headers used to build it. 
+
+    Parameters
+    ----------
+    file_path: str
+        Path to input file.
+    item_divisor: str, optional (default: '>')
+        String specifies a division of items. 
+    comments: List[str], optional (default: ['/*', '#'])
+        Strings that indicate comment lines.
+    skip_headers: int, opetional (default: 0)
+        The number of header lines to skip reading. Empty lines are not 
+        counted as headers. 
+    index_path: str, optional (default: '')
+        Path to the index file. If not given, '.idx' is added to file_path. 
+
+    Return
+    ------
+    Dict[str, Tuple[int, int]]
+        Dictionary of (offset, length) for each key. 
+    """
+    # Check if item_divisor is a string and is not empty. 
+    check_item_divisor(item_divisor)
+    check_not_compressed(file_path)
+
+    if index_path == '':
+        index_path = file_path + INDEX_SUFFIX
+
+    # Taken before reading so that a modification while reading is detected
+    stat = os.stat(file_path)
+    divisor = item_divisor.encode()
+    comment_prefixes = tuple(comment.encode() for comment in comments)
+    entries = []
+    key = None
+    key_offset = 0
+    offset = 0
+    line_count = 0
+
+    with open(file_path, 'rb') as f:
         for l in f:
-            # Remove empty characters (e.g., space, tab or next line) on both 
-            # left and right ends
-            line = l.rstrip('\n')
-
-            # If a line is empty
-            if line == '':
-                # If skip_empty_lines option is True
-                if skip_empty_lines:
-                    # Go to the next line
-                    continue
-            # If the line is not empty
-            else:
-                # Increment line count
-                line_count += 1
-                if line_count <= skip_headers:
-                    continue
-
-            # If a line starts with 'itemnum:'
-            if line.startswith('itemnum:'):
-                # Get the expected number of items
-                exp_itemnum = get_itemnum(line)
-                # Go to the next line
+            line_offset = offset
+            offset += len(l)
+            line = strip_line_end(l)
+
+            # Empty lines are neither headers nor items
+            if line == b'':
                 continue
 
-            # Check if this a comment line
-            full_line_comment = [
-                comment # Character indicating that this is a comment line 
-                for comment in comments if line.startswith(comment)
-            ]
-            # If a line starts with one of the comment, 
-            if len(full_line_comment) > 0:
-                # Go to the next line
+            line_count += 1
+            if line_count <= skip_headers:
                 continue
 
-            # If a line starts with the item_divisor, 
-            if line.startswith(item_divisor):
-                # If this is not empty (meaning that this is not the first item)
-                if key != '':
-                    # Assign key and value to the items dictionary
-                    if read_values:
-                        if join_value_lines:
-                            items[key] = ''.join(value)
-                        else:
-                            items[key] = value
-                    else:
-                        # Assign None if read_values is False.
-                        items[key] = None
-                
-                # Get item key from the current line
-                if include_key_order:
-                    key = (line.split(item_divisor)[1], key_id)
-                else:
-                    key = line.split(item_divisor)[1]
-                
+            # Same precedence as read_2D_list: itemnum and comment lines are 
+            # never item divisions. 
+            if line.startswith(b'itemnum:') or line.startswith(comment_prefixes):
+                continue
+
+            if line.startswith(divisor):
+                if key is not None:
+                    entries.append((key, key_offset, line_offset - key_offset))
+
+                key = line.decode().split(item_divisor)[1]
                 # Check if key is not empty
                 assert key != '', 'Empty key for 2D list is not supported.'
-                value = []
-                # Increment key ID    
-                key_id += 1
-                
+                key_offset = line_offset
+
+    if key is not None:
+        entries.append((key, key_offset, offset - key_offset))
+
+    header = {
+        'size': stat.st_size, 
+        'mtime_ns': stat.st_mtime_ns, 
+        'item_divisor': item_divisor, 
+        'comments': list(comments), 
+        'skip_headers': skip_headers, 
+    }
+    with open(index_path, 'w') as f:
+        print(INDEX_HEADER_PREFIX + json.dumps(header), file=f)
+        for key, key_offset, length in entries:
+            print(f'{key}\t{key_offset}\t{length}', file=f)
+
+    # Later items overwrite earlier ones as in read_2D_list.
+    return {key: (key_offset, length) for key, key_offset, length in entries}
+
+def read_2D_index(
+        index_path          : str, 
+        file_path           : str = '',
+        item_divisor        : Optional[str] = None,
+        comments            : Optional[List[str]] = None, 
+        skip_headers        : Optional[int] = None
+        ) -> Dict[str, Tuple[int, int]]:
+    """Read an index file made by build_2D_index. 
+
+    If file_path is given, the size and the modification time of the file 
+    are compared with the ones recorded in the index. If item_divisor, 
+    comments or skip_headers is given, it is compared with the option used 
+    to build the index. ValueError is raised if any of them is different. 
+
+    Return
+    ------
+    Dict[str, Tuple[int, int]]
+        Dictionary of (offset, length) for each key. 
+    """
+    index = {}
+
+    with open(index_path, 'r') as f:
+        header_line = f.readline().rstrip('\n')
+        if not header_line.startswith(INDEX_HEADER_PREFIX):
+            raise ValueError(
+                f'{index_path} is not an index file made by build_2D_index '
+                f'of this version. Please rebuild the index.')
+        header = json.loads(header_line[len(INDEX_HEADER_PREFIX):])
+
+        if file_path != '':
+            stat = os.stat(file_path)
+            if (stat.st_size, stat.st_mtime_ns) \
+                    != (header['size'], header['mtime_ns']):
+                raise ValueError(
+                    f'{index_path} is out of date. Please rebuild the index '
+                    f'of {file_path}.')
+
+        options = {
+            'item_divisor': item_divisor, 
+            'comments': None if comments is None else list(comments), 
+            'skip_headers': skip_headers, 
+        }
+        for name, value in options.items():
+            if value is not None and value != header[name]:
+                raise ValueError(
+                    f'{index_path} was built with {name}={header[name]!r}, '
+                    f'not {value!r}.')
+
+        for l in f:
+            key, key_offset, length = l.rstrip('\n').rsplit('\t', 2)
+            index[key] = (int(key_offset), int(length))
+
+    return index
+
+def fetch_2D_items(
+        file_path           : str, 
+        keys                : Iterable[str],
+        item_divisor        : str = '>',
+        comments            : List[str] = ['/*', '#'], 
+        apply_func          : Callable[[str], Any] = do_nothing, 
+        join_value_lines    : bool = False,
+        skip_empty_lines    : bool = True, 
+        index_path          : str = ''
+        ) -> Dict[str, Union[str, List[Any]]]:
+    """Read only the given items from a 2D list file using its index. 
+
+    Only bytes of the requested items are read, so the cost of a fetch 
+    depends on the size of the items, not on the size of the file. The index 
+    is built by build_2D_index if it does not exist, if the file was modified 
+    after it was built, or if it was built with different item_divisor or 
+    comments. 
+
+    Parameters
+    ----------
+    file_path: str
+        Path to input file.
+    keys: Iterable[str]
+        Keys of items to be read. KeyError is raised if a key is not indexed. 
+    index_path: str, optional (default: '')
+        Path to the index file. If not given, '.idx' is added to file_path. 
+    Other parameters are the same as read_2D_list. 
+
+    Return
+    ------
+    Dict[str, Union[str, List[Any]]]
+        Dictionary of items in the order of given keys. 
+    """
+    check_not_compressed(file_path)
+
+    if index_path == '':
+        index_path = file_path + INDEX_SUFFIX
+
+    index = None
+    if os.path.isfile(index_path):
+        try:
+            index = read_2D_index(
+                index_path, file_path, item_divisor, comments)
+        except ValueError:
+            # Stale index or index of other options
+            index = None
+    if index is None:
+        index = build_2D_index(
+            file_path, item_divisor, comments, index_path=index_path)
+
+    keys = list(keys)
+    fetched = {}
+
+    with open(file_path, 'rb') as f:
+        # Read items in the order of offsets to keep I/O sequential
+        for key in sorted(set(keys), key=lambda k: index[k][0]):
+            key_offset, length = index[key]
+            f.seek(key_offset)
+
+            records = _parse_2D_file(
+                f, item_divisor, comments, apply_func, join_value_lines, 
+                False, 0, skip_empty_lines, True, size=length)
+            for _, value in records:
+                fetched[key] = value
+
+    return {key: fetched[key] for key in keys}
+
+# =============== Primary Functions [end] =============== #
+
+# =============== Helper Functions [start] =============== #
+
+def _parse_1D_file(
+        f, comments, itemnum, apply_func, skip_empty_lines, skip_headers, 
+        dtype=None, size=-1):
+    """Parses 1D list from the current position of a binary file object and 
+    returns a tuple of items, the expected number of items (or None) and 
+    header lines. If size is not negative, at most size bytes are read. 
+    Items are a NumPy array if dtype is given, otherwise a list. 
+    """
+    # 'itemnum:' lines are classified only when itemnum is inferred. 
+    # Otherwise they are treated as value lines. 
+    scanner = LineScanner(
+        comments, itemnum=(itemnum == 'infer'), 
+        skip_empty_lines=skip_empty_lines, skip_headers=skip_headers)
+
+    # Initialize a list that will be returned from this function
+    items: List[Any] = []
+    exp_itemnum = None
+    header_lines = []
+
+    for kind, data in scanner.scan(f, size):
+        if kind == VALUES:
+            lines = scanner.split_values(data)
+            if len(lines) == 0:
+                continue
+
+            if dtype is not None:
+                # Convert all value lines in a block at once
+                items.append(np.array(lines, dtype=dtype))
+            elif apply_func is do_nothing:
+                items.extend(lines)
             else:
-                value.append(apply_func(line))
-    
-    if key != '':
-        # Assign key and value to the items dictionary
-        if read_values:
-            if join_value_lines:
-                items[key] = ''.join(value)
+                items.extend(map(apply_func, lines))
+
+        elif kind == ITEMNUM:
+            # Get the expected number of items
+            exp_itemnum = get_itemnum(scanner.decode(data))
+            continue
+
+        elif kind == HEADER:
+            header_lines.append(scanner.decode(data))
+            continue
+
+        # Any line after headers gives the expected number of items if it is 
+        # given as an integer. 
+        if isinstance(itemnum, int):
+            exp_itemnum = itemnum
+
+    if dtype is not None:
+        items = _concatenate_arrays(items, dtype)
+
+    return items, exp_itemnum, header_lines
+
+def _parse_2D_file(
+        f, item_divisor, comments, apply_func, join_value_lines, 
+        include_key_order, skip_headers, skip_empty_lines, read_values, 
+        keys=None, key_predicate=None, unique_keys=False, packed=False, 
+        size=-1):
+    """Generator yielding (key, value) of each item in 2D list from the 
+    current position of a binary file object. If size is not negative, at most 
+    size bytes are read. Only items selected by keys and key_predicate are 
+    yielded (see read_2D_list). 
+
+    A tuple of the expected number of items found in an 'itemnum:' line (or 
+    None) and the number of items read is returned when the generator is 
+    exhausted (StopIteration.value). 
+    """
+    scanner = LineScanner(
+        comments, item_divisor, itemnum=True, 
+        skip_empty_lines=skip_empty_lines, skip_headers=skip_headers)
+    # Value lines can be joined without splitting them if they are not parsed
+    join_at_once = join_value_lines and apply_func is do_nothing
+
+    key = ''
+    key_id = 0
+    value = []
+    exp_itemnum = None
+    # Whether the current item is yielded
+    selected = False
+    # Keys that are not read yet when reading stops after all keys are read
+    keys_left = set(keys) if unique_keys and keys is not None else None
+
+    for kind, data in scanner.scan(f, size):
+        if kind == VALUES:
+            # Value lines before the first item are ignored
+            if not selected or not read_values:
+                continue
+
+            if join_at_once:
+                value.append(scanner.join_values(data))
+            elif apply_func is do_nothing:
+                value.extend(scanner.split_values(data))
             else:
-                items[key] = value
-        else:
-            items[key] = None
+                value.extend(map(apply_func, scanner.split_values(data)))
 
-    if exp_itemnum != None:
-        # Raise Assertion error if the observed number of items is different 
-        # from the expected. 
-        check_item_number(len(items), exp_itemnum)
+        # If a line starts with the item_divisor, 
+        elif kind == DIVISOR:
+            # If the last item is selected
+            if selected:
+                yield key, _format_2D_value(
+                    value, join_value_lines, read_values, packed)
 
-    return items
+                if keys_left is not None:
+                    keys_left.discard(key[0] if include_key_order else key)
+                    # Stop reading if all the keys are read
+                    if len(keys_left) == 0:
+                        return exp_itemnum, key_id
 
-# =============== Primary Functions [end] =============== #
+            # Get item key from the current line
+            name = scanner.decode(data).split(item_divisor)[1]
+            if include_key_order:
+                key = (name, key_id)
+            else:
+                key = name
+
+            # Check if key is not empty
+            assert name != '', 'Empty key for 2D list is not supported.'
+            selected = (keys is None or name in keys) and \
+                (key_predicate is None or key_predicate(name))
+            value = []
+            # Increment key ID    
+            key_id += 1
+
+        elif kind == ITEMNUM:
+            # Get the expected number of items
+            exp_itemnum = get_itemnum(scanner.decode(data))
+
+    if selected:
+        yield key, _format_2D_value(
+            value, join_value_lines, read_values, packed)
+
+    return exp_itemnum, key_id
+
+def _load_from_cache(reader, cache, cache_key, arguments):
+    """Calls a reader through a ParseCache. arguments are local variables of 
+    the reader at its beginning (i.e., its arguments). 
+    """
+    kwargs = dict(arguments)
+    file_path = kwargs.pop('file_path')
+    del kwargs['cache'], kwargs['cache_key']
+    # The number of processes does not change the result
+    return cache.load(
+        reader, file_path, cache_key, key_exclude=['workers'], **kwargs)
+
+def _check_packed_option(packed, join_value_lines):
+    """Raises ValueError if values cannot be packed. """
+    if packed and not join_value_lines:
+        raise ValueError('packed = True requires join_value_lines = True.')
+
+def _check_splittable(file_path):
+    """Returns True if a file can be split into byte ranges. Otherwise warns 
+    that the file is read by one process. 
+    """
+    if is_compressed(file_path):
+        warn(f'{file_path} is compressed and is read by one process.')
+        return False
+    return True
+
+def _read_1D_list_parallel(
+        file_path, comments, itemnum, apply_func, skip_empty_lines, 
+        skip_headers, dtype, workers):
+    """Parses a 1D list file in a process pool and merges the results in the 
+    original order. Returns the same tuple as _parse_1D_file. 
+    """
+    ranges = split_file(file_path, workers * CHUNKS_PER_WORKER, skip_headers)
+    # Only the first range contains header lines
+    args = [
+        (file_path, start, end, comments, itemnum, apply_func, 
+         skip_empty_lines, skip_headers if n == 0 else 0, dtype)
+        for n, (start, end) in enumerate(ranges)
+    ]
+    items = []
+    exp_itemnum = None
+    header_lines = []
+
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_read_1D_range, args)
+
+        for n, (chunk_items, chunk_itemnum, chunk_headers) in enumerate(results):
+            if dtype is not None:
+                items.append(chunk_items)
+            else:
+                items.extend(chunk_items)
+            # The last itemnum line is used as in the serial path
+            if chunk_itemnum != None:
+                exp_itemnum = chunk_itemnum
+            if n == 0:
+                header_lines = chunk_headers
+
+    if dtype is not None:
+        items = _concatenate_arrays(items, dtype)
+
+    return items, exp_itemnum, header_lines
+
+def _read_1D_range(args):
+    """Parses lines of 1D list in a byte range of a file. """
+    file_path, start, end, *parse_args = args
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return _parse_1D_file(f, *parse_args, size=end - start)
+
+def _read_2D_list_parallel(
+        file_path, item_divisor, comments, apply_func, join_value_lines, 
+        include_key_order, skip_headers, skip_empty_lines, read_values, 
+        keys, key_predicate, unique_keys, packed, workers):
+    """Parses a 2D list file in a process pool and merges the results in the 
+    original order. Returns a dictionary of items and the expected number of 
+    items (or None). 
+    """
+    divisor = item_divisor.encode()
+    comment_prefixes = tuple(comment.encode() for comment in comments)
+
+    def is_item_start(line):
+        return line.startswith(divisor) \
+            and not line.startswith(b'itemnum:') \
+            and not line.startswith(comment_prefixes)
+
+    ranges = split_file(
+        file_path, workers * CHUNKS_PER_WORKER, skip_headers, is_item_start)
+    # Only the first range contains header lines. Each range numbers key 
+    # order from 0, and the numbers are shifted by the number of items in the 
+    # preceding ranges after merging. 
+    args = [
+        (file_path, start, end, item_divisor, comments, apply_func, 
+         join_value_lines, True, skip_headers if n == 0 else 0, 
+         skip_empty_lines, read_values, keys, key_predicate, unique_keys, 
+         packed)
+        for n, (start, end) in enumerate(ranges)
+    ]
+    items = {}
+    key_offset = 0
+    exp_itemnum = None
+
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_read_2D_range, args)
+
+        for records, chunk_itemnum, chunk_item_count in results:
+            for (name, key_id), value in records:
+                if include_key_order:
+                    items[(name, key_offset + key_id)] = value
+                else:
+                    items[name] = value
+
+            key_offset += chunk_item_count
+
+            # The last itemnum line is used as in the serial path
+            if chunk_itemnum != None:
+                exp_itemnum = chunk_itemnum
+
+    return items, exp_itemnum
+
+def _read_2D_range(args):
+    """Parses lines of 2D list in a byte range of a file. Returns a list of 
+    (key, value), the expected number of items (or None) and the number of 
+    items in the range. 
+    """
+    file_path, start, end, *parse_args = args
+    items = []
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        records = _parse_2D_file(f, *parse_args, size=end - start)
+
+        while True:
+            try:
+                items.append(next(records))
+            except StopIteration as stop:
+                return (items, *stop.value)
+
+def _format_2D_value(value, join_value_lines, read_values, packed=False):
+    """Returns a value of one item in 2D list. """
+    if read_values:
+        if packed:
+            return PackedSeq.from_str(''.join(value))
+        if join_value_lines:
+            return ''.join(value)
+        return value
+    # Assign None if read_values is False.
+    return None
+
+def _collect_2D_items(records):
+    """Consumes a generator made by _parse_2D_file and returns a dictionary 
+    of items and the expected number of items. 
+    """
+    items = {}
+
+    while True:
+        try:
+            key, value = next(records)
+        except StopIteration as stop:
+            exp_itemnum, _ = stop.value
+            return items, exp_itemnum
+
+        # Assign key and value to the items dictionary
+        items[key] = value
+
+# =============== Helper Functions [end] =============== #
 
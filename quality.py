@@ -0,0 +1,186 @@
+""" Vectorized operations on base qualities of FASTQ records. Quality strings
+of a batch of reads are decoded at once into a uint8 matrix (one row per read,
+padded with 0 after the end of each read), so statistics and trimming
+positions are computed by NumPy instead of loops over characters.
+"""
+
+import numpy as np
+import pandas as pd
+
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from .text import iter_fastq, FASTQ_COLUMNS
+
+# Offsets of Phred quality encodings
+PHRED33 = 33
+PHRED64 = 64
+
+# The number of records decoded at once in filter_fastq
+FILTER_BATCH_SIZE = 2 ** 16
+
+class Qualities(NamedTuple):
+    """Phred qualities of reads. """
+    values: np.ndarray  # uint8 matrix (reads x max length) padded with 0
+    lengths: np.ndarray # int64 length of each read
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Boolean matrix that is True at positions within reads. """
+        return np.arange(self.values.shape[1]) < self.lengths[:, None]
+
+def decode_qualities(quals: Sequence[str], offset: int = PHRED33) -> Qualities:
+    """Decode quality strings into Phred qualities.
+
+    Parameters
+    ----------
+    quals: Sequence[str]
+        Quality strings (e.g., the qual column of text.fastq_parser).
+    offset: int, optional (default: PHRED33)
+        PHRED33 (Sanger, Illumina 1.8+) or PHRED64 (Illumina 1.3-1.7).
+
+    Return
+    ------
+    Qualities
+        Padded uint8 matrix of qualities and lengths of reads.
+    """
+    lengths = np.fromiter(map(len, quals), dtype=np.int64, count=len(quals))
+    chars = np.frombuffer(''.join(quals).encode('ascii'), dtype=np.uint8)
+    if len(chars) > 0 and chars.min() < offset:
+        raise ValueError(
+            f'Quality character {chr(chars.min())!r} is below the offset '
+            f'{offset}.')
+    flat = chars - np.uint8(offset)
+
+    max_len = int(lengths.max()) if len(lengths) > 0 else 0
+    if (lengths == max_len).all():
+        # Reads of the same length need no padding
+        return Qualities(flat.reshape(len(lengths), max_len), lengths)
+
+    values = np.zeros((len(lengths), max_len), dtype=np.uint8)
+    # Positions within reads are filled in row-major order
+    values[np.arange(max_len) < lengths[:, None]] = flat
+    return Qualities(values, lengths)
+
+def mean_quality(q: Qualities) -> np.ndarray:
+    """Returns the mean quality of each read (NaN for an empty read). """
+    sums = q.values.sum(axis=1, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / q.lengths
+
+def count_below(q: Qualities, threshold: int) -> np.ndarray:
+    """Returns the number of bases whose quality is below threshold in each
+    read.
+    """
+    return ((q.values < threshold) & q.mask).sum(axis=1)
+
+def cycle_profile(q: Qualities) -> np.ndarray:
+    """Returns the mean quality of each cycle (position in reads). Reads
+    shorter than a cycle are not counted for the cycle.
+    """
+    sums = q.values.sum(axis=0, dtype=np.int64)
+    # Padding is 0, so only the number of reads covering a cycle is needed
+    counts = len(q.lengths) - np.searchsorted(
+        np.sort(q.lengths), np.arange(q.values.shape[1]), side='right')
+    return sums / counts
+
+def sliding_window_trim(
+        q:          Qualities,
+        window:     int = 4,
+        threshold:  float = 20
+        ) -> np.ndarray:
+    """Returns a trimming position of each read by a sliding window.
+
+    A read is cut at the start of the first window (from the 5' end) whose
+    mean quality is below threshold, in the same way as SLIDINGWINDOW of
+    Trimmomatic. A read shorter than window is cut at 0 if its mean quality is
+    below threshold. Bases before the returned position are kept.
+    """
+    max_len = q.values.shape[1]
+    positions = q.lengths.copy()
+    if max_len < window:
+        positions[mean_quality(q) < threshold] = 0
+        return positions
+
+    # Sums of shifted matrices use much less memory than cumulative sums of
+    # int64 for a usual window size
+    window_num = max_len - window + 1
+    dtype = np.uint16 if window * 255 < 2 ** 16 else np.int64
+    window_sums = q.values[:, :window_num].astype(dtype)
+    for shift in range(1, window):
+        window_sums += q.values[:, shift:shift + window_num]
+
+    starts = np.arange(window_num)
+    low = (window_sums < threshold * window) \
+        & (starts + window <= q.lengths[:, None])
+    has_low = low.any(axis=1)
+    positions[has_low] = low[has_low].argmax(axis=1)
+
+    short = q.lengths < window
+    positions[short & (mean_quality(q) < threshold)] = 0
+    return positions
+
+def filter_fastq(
+        fastq_path:         str,
+        min_mean_quality:   float = 0,
+        low_quality:        int = 20,
+        max_low_bases:      Optional[int] = None,
+        trim_window:        int = 0,
+        trim_quality:       float = 20,
+        min_length:         int = 0,
+        offset:             int = PHRED33,
+        batch_size:         int = FILTER_BATCH_SIZE
+        ) -> Iterator[pd.DataFrame]:
+    """Filter and trim records of a FASTQ file in batches.
+
+    Records are read by text.iter_fastq, so memory is bounded by batch_size.
+    Reads are first trimmed (if trim_window > 0) and then filtered by their
+    trimmed qualities.
+
+    Parameters
+    ----------
+    fastq_path: str
+        Path to a FASTQ file (may be compressed).
+    min_mean_quality: float, optional (default: 0)
+        Minimum mean quality of a read.
+    low_quality: int, optional (default: 20)
+        Bases whose quality is below this are low-quality bases.
+    max_low_bases: int, optional (default: None)
+        Maximum number of low-quality bases in a read. Not checked if None.
+    trim_window: int, optional (default: 0)
+        Window size of sliding_window_trim. Reads are not trimmed if 0.
+    trim_quality: float, optional (default: 20)
+        Threshold of mean quality of a window in sliding_window_trim.
+    min_length: int, optional (default: 0)
+        Minimum length of a read after trimming. Empty reads are always
+        removed.
+    offset: int, optional (default: PHRED33)
+        Offset of quality encoding.
+    batch_size: int, optional (default: FILTER_BATCH_SIZE)
+        The number of records processed at once.
+
+    Return
+    ------
+    Iterator[pd.DataFrame]
+        Passed records with columns of text.FASTQ_COLUMNS. A batch may be
+        empty.
+    """
+    for batch in iter_fastq(fastq_path, batch_size=batch_size):
+        q = decode_qualities(batch['qual'].tolist(), offset)
+
+        if trim_window > 0:
+            positions = sliding_window_trim(q, trim_window, trim_quality)
+            q = Qualities(q.values, positions)
+            # Qualities after the trimming positions are ignored
+            q.values[~q.mask] = 0
+            batch['seq'] = [s[:p] for s, p in
+                            zip(batch['seq'].tolist(), positions.tolist())]
+            batch['qual'] = [s[:p] for s, p in
+                             zip(batch['qual'].tolist(), positions.tolist())]
+
+        passed = q.lengths >= max(min_length, 1)
+        if min_mean_quality > 0:
+            passed &= mean_quality(q) >= min_mean_quality
+        if max_low_bases is not None:
+            passed &= count_below(q, low_quality) <= max_low_bases
+
+        yield batch.loc[passed, list(FASTQ_COLUMNS)].reset_index(drop=True)
@@ -0,0 +1,188 @@
+""" Subsampling of records of FASTQ, BED and 1D list files in one pass with
+constant memory. A fixed number of records is sampled by a reservoir, and a
+fraction of records is sampled by hashing record keys, which selects the same
+reads from paired FASTQ files.
+"""
+
+import math
+import random
+import hashlib
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from .compression import open_input, open_output
+from .linescan import LineScanner, VALUES
+from .text import iter_fastq, write_fastq
+
+FILE_TYPES = ('fastq', 'bed', '1D')
+
+# Comment strings of each line-based file type
+COMMENTS = {
+    'bed': ['#', 'track', 'browser'],
+    '1D': ['/*', '#'],
+}
+
+def reservoir_sample(
+        items:  Iterable[Any],
+        k:      int,
+        seed:   Optional[int] = None
+        ) -> List[Any]:
+    """Returns k items sampled uniformly without replacement, in the order of
+    items. All items are returned if there are not more than k items.
+
+    Algorithm L (Li, 1994) is used: the number of items skipped until the
+    next replacement is drawn at once, so random numbers are generated only
+    for replaced items and skipped items are consumed by islice.
+    """
+    assert k >= 0, 'k must not be negative.'
+    rng = random.Random(seed)
+    items = iter(items)
+    reservoir = list(enumerate(islice(items, k)))
+    if len(reservoir) < k or k == 0:
+        return [item for _, item in reservoir]
+
+    index = k - 1
+    w = math.exp(math.log(_random(rng)) / k)
+    while True:
+        skip = int(math.log(_random(rng)) / math.log(1 - w))
+        item = next(islice(items, skip, None), _END)
+        if item is _END:
+            break
+        index += skip + 1
+        reservoir[rng.randrange(k)] = (index, item)
+        w *= math.exp(math.log(_random(rng)) / k)
+
+    return [item for _, item in sorted(reservoir, key=lambda x: x[0])]
+
+def hash_sample(
+        items:      Iterable[Any],
+        fraction:   float,
+        key:        Callable[[Any], str] = str,
+        seed:       int = 0
+        ) -> Iterator[Any]:
+    """Yields items whose hashed key is below fraction.
+
+    Whether an item is sampled depends only on its key, fraction and seed,
+    so the same keys are sampled from different files (e.g., paired FASTQ
+    files) and from different runs.
+    """
+    assert 0 <= fraction <= 1, 'fraction must be between 0 and 1.'
+    threshold = int(fraction * 2 ** 64)
+    salt = seed.to_bytes(8, 'little', signed=True)
+
+    for item in items:
+        digest = hashlib.blake2b(
+            key(item).encode(), digest_size=8, salt=salt).digest()
+        if int.from_bytes(digest, 'little') < threshold:
+            yield item
+
+def iter_records(file_path: str, file_type: str) -> Iterator[Any]:
+    """Yields records of a file: tuples of 4 lines of a FASTQ record, or
+    lines of a BED or 1D list file. Comment lines, 'itemnum:' lines and empty
+    lines are skipped.
+    """
+    if file_type == 'fastq':
+        yield from iter_fastq(file_path)
+        return
+
+    if file_type not in COMMENTS:
+        raise ValueError(f'Unknown file type: {file_type}')
+
+    scanner = LineScanner(comments=COMMENTS[file_type], itemnum=True)
+    with open_input(file_path) as f:
+        for kind, data in scanner.scan(f):
+            if kind == VALUES:
+                yield from scanner.split_values(data)
+
+def record_key(record: Any, file_type: str) -> str:
+    """Returns a key of a record for hash_sample. The key of a FASTQ record
+    is the read name without '/1' or '/2', and the key of a BED line is the
+    name column (or the whole line if it does not exist).
+    """
+    if file_type == 'fastq':
+        name = record[0][1:].split(maxsplit=1)[0]
+        if name[-2:] in ('/1', '/2'):
+            name = name[:-2]
+        return name
+
+    if file_type == 'bed':
+        columns = record.split('\t', 4)
+        if len(columns) > 3:
+            return columns[3]
+
+    return record
+
+def subsample_file(
+        file_path:  str,
+        out_path:   str,
+        file_type:  str,
+        size:       Optional[int] = None,
+        fraction:   Optional[float] = None,
+        seed:       int = 0
+        ) -> int:
+    """Subsample records of a file and write them to out_path.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to input file (may be compressed).
+    out_path: str
+        Path to output file. Compressed if it ends with '.gz' or '.zst'.
+    file_type: str
+        'fastq', 'bed' or '1D'.
+    size: int, optional (default: None)
+        The number of records sampled by reservoir_sample.
+    fraction: float, optional (default: None)
+        Fraction of records sampled by hash_sample. Either size or fraction
+        must be given. Use the same fraction and seed for paired files.
+    seed: int, optional (default: 0)
+        Seed of the random numbers or the hash.
+
+    Return
+    ------
+    int
+        The number of written records.
+    """
+    assert (size is None) != (fraction is None), \
+        'Please give either size or fraction.'
+
+    records = iter_records(file_path, file_type)
+    if size is not None:
+        records = reservoir_sample(records, size, seed)
+    else:
+        records = hash_sample(
+            records, fraction, lambda r: record_key(r, file_type), seed)
+
+    counter = _Counter(records)
+    if file_type == 'fastq':
+        write_fastq(out_path, counter)
+    else:
+        with open_output(out_path) as f:
+            for line in counter:
+                f.write(line.encode() + b'\n')
+
+    return counter.count
+
+def _random(rng):
+    """Returns a random number in (0, 1) whose logarithm is finite. """
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+class _Counter:
+    """Iterator counting items of another iterable. """
+    def __init__(self, items):
+        self._items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
+
+# Sentinel of the end of items
+_END = object()
@@ -0,0 +1,21 @@
+from nothingspecial import bed
+
+def test_read_bed_with_track_line(tmp_path):
+    bed_path = tmp_path / 'genes.bed'
+    bed_path.write_text(
+        'browser position chr1:1-1000\n'
+        'track name=genes description="Genes #1"\n'
+        '# comment\n'
+        'chr1\t10\t20\tgene#1\t0\t+\n'
+        'chr2\t5\t8\tgene2\t.\t-\n')
+
+    beds = bed.read_bed(str(bed_path))
+    assert list(beds) == ['chr1', 'chr2']
+    assert beds['chr1']['start'].tolist() == [10]
+    assert beds['chr1']['end'].tolist() == [20]
+    # '#' within a line is not a comment
+    assert beds['chr1']['name'].tolist() == ['gene#1']
+    assert beds['chr2']['strand'].tolist() == ['-']
+
+    chunks = list(bed.iter_bed(str(bed_path), ('chrom', 'start', 'end')))
+    assert sum(len(chunk) for chunk in chunks) == 2
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from nothingspecial.classes import Database, GeneticCode
+
+def test_filter_with_indexes_on_columns_with_nulls():
+    df = pd.DataFrame({
+        'a': ['x', None, 'y', np.nan, 'x', 'z'],
+        'b': [1.5, np.nan, 3.0, 0.5, np.nan, 2.0],
+        'c': ['x', 1, None, 'y', 2.5, 'x'],
+    })
+    queries = [
+        dict(a='x'), dict(a=['x', 'z']), dict(a='ne1'), dict(a=5),
+        dict(b='gte1.5'), dict(b=('gt0', 'lt3')), dict(b=3.0),
+        dict(c='x'), dict(c=1), dict(a='x', b='lt2'),
+    ]
+    plain = Database(df)
+    for index_type in ('hash', 'sorted'):
+        indexed = Database(df, indexes={
+            'a': index_type, 'b': index_type, 'c': index_type})
+        for query in queries:
+            assert indexed.filter(**query).equals(plain.filter(**query)), \
+                (index_type, query)
+
+    assert Database(df, indexes={'a': 'sorted'}).filter(a='x').index.tolist() \
+        == [0, 4]
+
+def test_codons_with_or_keep_table_order(tmp_path):
+    csv_path = tmp_path / 'code.csv'
+    pd.DataFrame({
+        'codon': ['TTT', 'TTC', 'TTA', 'TTG', 'CTT', 'AAA'],
+        'aa1': ['F', 'F', 'L', 'L', 'L', 'K'],
+        'coddig': [1, 2, 3, 4, 5, 6],
+    }).to_csv(csv_path, index=False)
+    code = GeneticCode(str(csv_path))
+
+    # Rows matching several items are returned once in the order of the table
+    assert code.codons(aa1=['L', 'F']) == ['TTT', 'TTC', 'TTA', 'TTG', 'CTT']
+    assert code.codons(codon=['c/^TT/', 'c/T$/']) \
+        == ['TTT', 'TTC', 'TTA', 'TTG', 'CTT']
@@ -0,0 +1,86 @@
+import os
+import random
+
+import pytest
+
+from nothingspecial import faidx
+from nothingspecial.faidx import FaiEntry, FastaIndex
+
+SEQS = {'chr1': 'ACGTACGTAC' * 7 + 'GGA', 'chr2': 'TTGCA', 'chr3': 'N' * 12}
+
+def write_fasta(path, seqs, line_bases=10, crlf=False, final_newline=True):
+    sep = '\r\n' if crlf else '\n'
+    lines = []
+    for name, seq in seqs.items():
+        lines.append(f'>{name} description')
+        lines.extend(seq[i:i + line_bases]
+                     for i in range(0, len(seq), line_bases))
+    path.write_bytes(
+        (sep.join(lines) + (sep if final_newline else '')).encode())
+    return str(path)
+
+@pytest.mark.parametrize('crlf', [False, True])
+def test_build_fai(tmp_path, crlf):
+    fasta_path = write_fasta(tmp_path / 'a.fa', SEQS, crlf=crlf)
+    index = faidx.build_fai(fasta_path)
+    terminator = 2 if crlf else 1
+
+    assert list(index) == ['chr1', 'chr2', 'chr3']
+    header = len('>chr1 description') + terminator
+    assert index['chr1'] == FaiEntry(73, header, 10, 10 + terminator)
+    # A single line has the same terminator as the file
+    assert index['chr2'].line_width == 5 + terminator
+    assert faidx.read_fai(fasta_path + faidx.FAI_SUFFIX) == index
+
+@pytest.mark.parametrize('crlf', [False, True])
+def test_single_line_without_terminator(tmp_path, crlf):
+    fasta_path = write_fasta(tmp_path / 'a.fa', {'chr2': 'TTGCA'},
+                             crlf=crlf, final_newline=False)
+    index = faidx.build_fai(fasta_path)
+    assert index['chr2'] == FaiEntry(
+        5, len('>chr2 description') + (2 if crlf else 1), 5,
+        7 if crlf else 6)
+
+@pytest.mark.parametrize('crlf', [False, True])
+def test_fetch_and_fetch_many(tmp_path, crlf):
+    fasta_path = write_fasta(tmp_path / 'a.fa', SEQS, line_bases=7, crlf=crlf)
+    rng = random.Random(0)
+    regions = []
+    for _ in range(200):
+        name = rng.choice(list(SEQS))
+        start = rng.randrange(len(SEQS[name]) + 1)
+        end = rng.randrange(start, len(SEQS[name]) + 3)
+        regions.append((name, start, end))
+
+    with FastaIndex(fasta_path) as fasta:
+        for name, start, end in regions:
+            assert fasta.fetch(name, start, end) == SEQS[name][start:end]
+        assert fasta.fetch('chr1') == SEQS['chr1']
+        assert fasta.fetch_many(regions) \
+            == [SEQS[name][start:end] for name, start, end in regions]
+        with pytest.raises(KeyError):
+            fasta.fetch('chrX', 0, 1)
+
+def test_stale_fai_is_rebuilt(tmp_path):
+    fasta_path = write_fasta(tmp_path / 'a.fa', SEQS)
+    fai_path = fasta_path + faidx.FAI_SUFFIX
+    with FastaIndex(fasta_path) as fasta:
+        assert fasta.fetch('chr2') == 'TTGCA'
+
+    # Rewritten FASTA file newer than the index
+    new_seqs = {'chr2': 'CCCCCCCCCCCC', 'chr1': 'GATTACA'}
+    write_fasta(tmp_path / 'a.fa', new_seqs)
+    fai_mtime = os.stat(fai_path).st_mtime_ns
+    os.utime(fasta_path, ns=(fai_mtime + 10 ** 9, fai_mtime + 10 ** 9))
+    with FastaIndex(fasta_path) as fasta:
+        assert fasta.fetch('chr2') == new_seqs['chr2']
+        assert fasta.fetch('chr1') == new_seqs['chr1']
+
+    # Entries beyond the end of the file even if the index is newer
+    write_fasta(tmp_path / 'a.fa', {'chr1': 'ACGT' * 30})
+    faidx.build_fai(fasta_path)
+    write_fasta(tmp_path / 'a.fa', {'chr1': 'TGCA'})
+    fai_mtime = os.stat(fai_path).st_mtime_ns
+    os.utime(fasta_path, ns=(fai_mtime - 10 ** 9, fai_mtime - 10 ** 9))
+    with FastaIndex(fasta_path) as fasta:
+        assert fasta.fetch('chr1') == 'TGCA'
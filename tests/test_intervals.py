@@ -0,0 +1,42 @@
+import numpy as np
+
+from nothingspecial import intervals
+from nothingspecial.intervals import IntervalIndex
+
+def brute_pairs(starts, ends, query_starts, query_ends):
+    return sorted(
+        (q, i) for q in range(len(query_starts)) for i in range(len(starts))
+        if starts[i] < query_ends[q] and ends[i] > query_starts[q])
+
+def test_count_overlaps_empty_query_and_interval():
+    index = IntervalIndex({'1': {'start': [5, 3], 'end': [5, 7]}})
+    counts = index.count_overlaps('1', [5, 5, 0], [5, 5, 1])
+    assert counts.tolist() == [1, 1, 0]
+
+    index = IntervalIndex({'1': {'start': [5], 'end': [5]}})
+    assert index.count_overlaps('1', [5], [5]).tolist() == [0]
+
+def test_overlap_pairs_with_long_interval(monkeypatch):
+    monkeypatch.setattr(intervals, 'CANDIDATE_CHUNK_SIZE', 5)
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 1000, 200)
+    ends = starts + rng.integers(0, 30, 200)
+    # A chromosome-length interval in the middle of short ones
+    starts[50], ends[50] = 0, 1000
+    query_starts = rng.integers(0, 1000, 100)
+    query_ends = query_starts + rng.integers(0, 50, 100)
+
+    index = IntervalIndex({'1': {'start': starts, 'end': ends}})
+    query_ids, interval_ids = index.overlap_pairs(
+        '1', query_starts, query_ends)
+    expected = brute_pairs(starts, ends, query_starts, query_ends)
+    assert sorted(zip(query_ids.tolist(), interval_ids.tolist())) == expected
+
+    # Sorted by query starts and then by interval starts
+    assert (np.diff(query_starts[query_ids]) >= 0).all()
+    same = query_ids[1:] == query_ids[:-1]
+    assert (np.diff(starts[interval_ids])[same] >= 0).all()
+
+    counts = index.count_overlaps('1', query_starts, query_ends)
+    assert counts.tolist() == np.bincount(
+        [q for q, _ in expected], minlength=100).tolist()
@@ -0,0 +1,165 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from nothingspecial import num
+
+def test_count_csv_mixed_types_across_chunks(tmp_path):
+    # The first chunk is parsed as int and the second one as str unless
+    # the column is read as str
+    values = [1, 2] * 300 + ['a', 1, 'b', 2] * 100
+    groups = ['x', 'y'] * 500
+    csv_path = str(tmp_path / 'mixed.csv')
+    pd.DataFrame({'value': values, 'group': groups}) \
+        .to_csv(csv_path, index=False)
+
+    expected = {'1': 400, '2': 400, 'a': 100, 'b': 100}
+    for kwargs in [dict(chunksize=500), dict(chunksize=500, workers=2)]:
+        counts = num.count_csv(csv_path, 'value', **kwargs)
+        assert counts.to_dict() == expected
+
+        res_df = num.count_occurrence(
+            csv_path, 'value', to_file=False, **kwargs)
+        assert res_df['value'].tolist() == ['1', '2', 'a', 'b']
+        assert res_df['count'].tolist() == [400, 400, 100, 100]
+
+    counts = num.count_csv(csv_path, 'value', by=('group', 'x'),
+                           chunksize=500, workers=2)
+    assert counts.to_dict() == {'1': 300, 'a': 100, 'b': 100}
+
+def test_slide_window_does_not_modify_input():
+    data_df = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0, 5.0]})
+    res_df = num.slide_window(data_df, 3, ['a'])
+
+    assert list(data_df.columns) == ['a']
+    assert res_df['a'].tolist() == data_df['a'].tolist()
+    assert res_df['a_win3'].tolist()[1:4] == [2.0, 3.0, 4.0]
+    assert res_df['a_win3'].isna().tolist() == [True, False, False, False, True]
+
+def test_count_csv_compressed_without_suffix(tmp_path):
+    import gzip
+
+    # Compressed data is detected by magic bytes, not by the suffix
+    csv_path = tmp_path / 'counts.csv.bgz'
+    csv_path.write_bytes(gzip.compress(b'value\n' + b'a\nb\na\n' * 1000))
+    for kwargs in [dict(), dict(workers=2, chunksize=100)]:
+        counts = num.count_csv(str(csv_path), 'value', **kwargs)
+        assert counts.to_dict() == {'a': 2000, 'b': 1000}
+
+def _old_search_items_df(df, **kwargs):
+    # search_items_df and Database.filter before compile_query
+    def f(res_df, k, v):
+        if not isinstance(v, str):
+            res_df = res_df[res_df[k] == v]
+        elif v == '*':
+            pass
+        elif re.search(r'^gt\d+', v):
+            v = float(re.search(r'^gt(\d+\.*\d*)$', v).group(1))
+            res_df = res_df[res_df[k] > v]
+        elif re.search(r'^gte\d+', v):
+            v = float(re.search(r'^gte(\d+\.*\d*)$', v).group(1))
+            res_df = res_df[res_df[k] >= v]
+        elif re.search(r'^lt\d+', v):
+            v = float(re.search(r'^lt(\d+\.*\d*)$', v).group(1))
+            res_df = res_df[res_df[k] < v]
+        elif re.search(r'^lte\d+', v):
+            v = float(re.search(r'lte(\d+\.*\d*)$', v).group(1))
+            res_df = res_df[res_df[k] <= v]
+        elif re.search(r'^ne\d+', v):
+            v = float(re.search(r'ne(\d+\.*\d*)$', v).group(1))
+            res_df = res_df[res_df[k] != v]
+        elif re.search(r'^c\/', v):
+            v = re.search(r'^c\/(.+)\/$', v).group(1)
+            res_df = res_df[res_df[k].str.contains(v)]
+        elif re.search(r'^nc\/', v):
+            v = re.search(r'^nc\/(.+)\/$', v).group(1)
+            res_df = res_df[~res_df[k].str.contains(v)]
+        else:
+            res_df = res_df[res_df[k] == v]
+        return res_df
+
+    res_df = df
+    for k, v in kwargs.items():
+        if isinstance(v, list):
+            res_df = pd.concat([f(res_df, k, i) for i in v])
+        elif isinstance(v, tuple):
+            for i in v:
+                res_df = f(res_df, k, i)
+        elif isinstance(v, str):
+            res_df = f(res_df, k, v)
+        else:
+            res_df = res_df[res_df[k] == v]
+    return res_df
+
+def test_compile_query_matches_old_search_items_df():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'name': rng.choice(['abc', 'abd', 'xyz', 'xab', 'q'], 300),
+        'num': rng.integers(0, 10, 300),
+        'val': rng.random(300).round(2) * 10,
+    }, index=rng.permutation(1000)[:300])
+    queries = [
+        dict(name='c/ab/'), dict(name='nc/ab/'), dict(name='xyz'),
+        dict(name=('c/ab/', 'nc/^x/')), dict(num='ne3'), dict(num=4),
+        dict(val='gte2.5'), dict(val=('gte2', 'lt7.5')), dict(num='lte5'),
+        dict(num=('gt2', 'ne5'), name='c/b/', val='lt8'),
+        dict(name='*', num='gte0'), dict(name=('*', 'q')),
+    ]
+    for query in queries:
+        res_df = num.compile_query(**query).apply(df)
+        assert res_df.equals(_old_search_items_df(df, **query)), query
+        assert num.search_items_df(df, **query).equals(res_df), query
+
+    # "or" keeps the original order of rows without duplicates
+    list_queries = [
+        dict(name=['c/ab/', 'xyz']), dict(num=['lt3', 'gte7', 'ne5']),
+        dict(name=['q', 'abc'], val='lt5'), dict(num=[1, 2], name='nc/x/'),
+    ]
+    for query in list_queries:
+        old_df = _old_search_items_df(df, **query)
+        expected = df.loc[df.index.isin(old_df.index)]
+        res_df = num.compile_query(**query).apply(df)
+        assert res_df.equals(expected), query
+
+def _track(row_num, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(1e3, 50, (row_num, 2))
+    values[rng.random((row_num, 2)) < 0.05] = np.nan
+    values[100:160, 0] = np.nan
+    return pd.DataFrame(values, columns=['a', 'b'])
+
+def test_iter_windows_across_chunks_equals_rolling_windows():
+    df = _track(3000)
+    params = [
+        dict(win_sizes=[1, 5, 50], stats=num.WINDOW_STATS),
+        dict(win_sizes=[7, 64], step=3, align='center', min_count=3),
+        dict(win_sizes=[10, 200], step=7, align='right', skipna=False),
+    ]
+    for kwargs in params:
+        expected = num.rolling_windows(df, ['a', 'b'], **kwargs)
+        for chunksize in [7, 13, 1000, 5000]:
+            chunks = (df.iloc[i:i + chunksize]
+                      for i in range(0, len(df), chunksize))
+            res_df = pd.concat(num.iter_windows(chunks, ['a', 'b'], **kwargs))
+            pd.testing.assert_frame_equal(res_df, expected)
+
+def test_stream_windows_equals_rolling_windows(tmp_path):
+    df = _track(2500, seed=1)
+    expected = num.rolling_windows(df, ['a', 'b'], [4, 31],
+                                   stats=('mean', 'max'), step=2)
+
+    csv_path = str(tmp_path / 'track.csv')
+    df.to_csv(csv_path, index=False)
+    npy_path = str(tmp_path / 'track.npy')
+    np.save(npy_path, df.to_numpy())
+
+    for track_path in (csv_path, npy_path):
+        out_path = str(tmp_path / 'windows.csv')
+        row_num = num.stream_windows(
+            track_path, out_path, ['a', 'b'], [4, 31],
+            stats=('mean', 'max'), step=2, chunksize=333)
+        assert row_num == len(expected)
+        res_df = pd.read_csv(out_path, index_col=0)
+        pd.testing.assert_frame_equal(res_df, expected, check_exact=False,
+                                      rtol=1e-12, check_index_type=False)
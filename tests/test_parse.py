@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from nothingspecial import linescan, parse, text
+
+def write_2D_list(path, lines, mtime_ns):
+    path.write_text('\n'.join(lines) + '\n')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_fetch_2D_items_rebuilds_index_after_same_size_edit(tmp_path):
+    file_path = tmp_path / 'items.txt'
+    write_2D_list(file_path, ['>a', 'ACGT', '>b', 'TTTT'], 10 ** 18)
+    assert parse.fetch_2D_items(str(file_path), ['a']) == {'a': ['ACGT']}
+
+    # The same size as the indexed file
+    write_2D_list(file_path, ['>c', 'ACGA', '>b', 'TTTT'], 2 * 10 ** 18)
+    index_path = str(file_path) + parse.INDEX_SUFFIX
+    with pytest.raises(ValueError):
+        parse.read_2D_index(index_path, str(file_path))
+
+    assert parse.fetch_2D_items(str(file_path), ['c']) == {'c': ['ACGA']}
+    assert 'a' not in parse.read_2D_index(index_path, str(file_path))
+
+def test_read_2D_index_checks_options(tmp_path):
+    file_path = tmp_path / 'items.txt'
+    write_2D_list(file_path, ['>a', 'AC', '@b', 'GG'], 10 ** 18)
+    index_path = str(file_path) + parse.INDEX_SUFFIX
+    parse.build_2D_index(str(file_path))
+
+    with pytest.raises(ValueError):
+        parse.read_2D_index(index_path, str(file_path), item_divisor='@')
+    with pytest.raises(ValueError):
+        parse.read_2D_index(index_path, str(file_path), comments=['#'])
+
+    # The index is rebuilt with the given item_divisor
+    assert parse.fetch_2D_items(str(file_path), ['b'], item_divisor='@') \
+        == {'b': ['GG']}
+
+# Parity of the LineScanner readers with the line-by-line readers they
+# replaced. Expected values are outputs of the previous readers.
+LIST_1D = ['# comment', 'HEADER', 'itemnum: 4', '/* block */', 'item1', '',
+           'item2', '# mid', 'item3', 'item4']
+LIST_2D = ['/* comment */', 'header line', 'itemnum: 2', '>key1', 'AAA', 'CCC',
+           '', '# c', '>key2', 'GGG', 'TT']
+FASTA = ['>s1 desc', 'ACGT', 'AC', '', '>s2', 'GG', 'T']
+
+CASES_2D = [
+    (dict(), {'key1': ['AAA', 'CCC'], 'key2': ['GGG', 'TT']}),
+    (dict(skip_headers=1), {'key1': ['AAA', 'CCC'], 'key2': ['GGG', 'TT']}),
+    (dict(skip_headers=1, join_value_lines=True, include_key_order=True),
+     {('key1', 0): 'AAACCC', ('key2', 1): 'GGGTT'}),
+    (dict(skip_headers=1, skip_empty_lines=False),
+     {'key1': ['AAA', 'CCC', ''], 'key2': ['GGG', 'TT']}),
+    (dict(skip_headers=1, read_values=False), {'key1': None, 'key2': None}),
+]
+
+def write_lines(path, lines, crlf, final_newline):
+    sep = '\r\n' if crlf else '\n'
+    path.write_bytes(
+        (sep.join(lines) + (sep if final_newline else '')).encode())
+    return str(path)
+
+@pytest.fixture(params=[1, 3, 2 ** 20], ids=lambda size: f'block{size}')
+def block_size(request, monkeypatch):
+    monkeypatch.setattr(linescan, 'BLOCK_SIZE', request.param)
+    return request.param
+
+@pytest.mark.parametrize('crlf', [False, True])
+@pytest.mark.parametrize('final_newline', [False, True])
+def test_read_1D_list_parity(tmp_path, block_size, crlf, final_newline):
+    file_path = write_lines(
+        tmp_path / 'list.txt', LIST_1D, crlf, final_newline)
+
+    items, headers = parse.read_1D_list(file_path, itemnum=None,
+                                        skip_headers=2)
+    assert items == ['itemnum: 4', 'item1', 'item2', 'item3', 'item4']
+    assert headers == ['# comment', 'HEADER']
+
+    with pytest.raises(AssertionError,
+                       match='Wrong number of items found: 5. 4 was expected.'):
+        parse.read_1D_list(file_path, skip_headers=1)
+    with pytest.raises(AssertionError,
+                       match='Wrong number of items found: 6. 4 was expected.'):
+        parse.read_1D_list(file_path, skip_headers=1, skip_empty_lines=False)
+
+@pytest.mark.parametrize('crlf', [False, True])
+@pytest.mark.parametrize('final_newline', [False, True])
+@pytest.mark.parametrize('kwargs, expected', CASES_2D)
+def test_read_2D_list_parity(tmp_path, block_size, crlf, final_newline,
+                             kwargs, expected):
+    file_path = write_lines(
+        tmp_path / 'list.txt', LIST_2D, crlf, final_newline)
+    items = parse.read_2D_list(file_path, **kwargs)
+    assert items == expected
+    assert list(items) == list(expected)
+
+@pytest.mark.parametrize('crlf', [False, True])
+@pytest.mark.parametrize('final_newline', [False, True])
+def test_parse_fasta_parity(tmp_path, block_size, crlf, final_newline):
+    fasta_path = write_lines(
+        tmp_path / 'seqs.fa', FASTA, crlf, final_newline)
+    # The previous reader dropped the last base of a last line without a
+    # line terminator
+    assert text.parse_fasta(fasta_path) == {'s1 desc': 'ACGTAC', 's2': 'GGT'}
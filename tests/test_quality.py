@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from nothingspecial import quality
+
+def _trim_position(quals, window, threshold):
+    # Scalar SLIDINGWINDOW of Trimmomatic
+    if len(quals) < window:
+        low = len(quals) > 0 and sum(quals) / len(quals) < threshold
+        return 0 if low else len(quals)
+    for i in range(len(quals) - window + 1):
+        if sum(quals[i:i + window]) / window < threshold:
+            return i
+    return len(quals)
+
+@pytest.mark.parametrize('window, threshold', [
+    (1, 20), (4, 20), (4, 15.5), (5, 30), (300, 20)])
+def test_sliding_window_trim_matches_scalar(window, threshold):
+    rng = np.random.default_rng(window)
+    reads = []
+    for length in rng.integers(0, 40, 500):
+        # Qualities drop towards the 3' end
+        quals = np.clip(rng.normal(np.linspace(38, 10, length), 8), 0, 41)
+        reads.append(quals.astype(int).tolist())
+    reads.append([41] * 20)
+    quals = [''.join(chr(v + quality.PHRED33) for v in r) for r in reads]
+
+    positions = quality.sliding_window_trim(
+        quality.decode_qualities(quals), window, threshold)
+    assert positions.tolist() \
+        == [_trim_position(r, window, threshold) for r in reads]
+
+def test_sliding_window_trim_reads_of_same_length():
+    quals = ['IIII#III', 'IIIIIIII', '########']
+    positions = quality.sliding_window_trim(
+        quality.decode_qualities(quals), window=2, threshold=25)
+    assert positions.tolist() == [3, 8, 0]
@@ -0,0 +1,58 @@
+import random
+
+from nothingspecial import subsample
+from nothingspecial.text import iter_fastq, write_fastq
+
+def _write_pair(tmp_path, n, casava=False):
+    rng = random.Random(0)
+    reads = []
+    for i in range(n):
+        seq = ''.join(rng.choice('ACGT') for _ in range(30))
+        reads.append((f'read{i}:{rng.randrange(10 ** 6)}', seq))
+
+    paths = []
+    for mate in (1, 2):
+        if casava:
+            names = [f'@{name} {mate}:N:0:ACGT' for name, _ in reads]
+        else:
+            names = [f'@{name}/{mate}' for name, _ in reads]
+        records = [(name, seq, '+', 'I' * len(seq))
+                   for name, (_, seq) in zip(names, reads)]
+        suffix = '.fastq.gz' if mate == 2 else '.fastq'
+        path = str(tmp_path / f'R{mate}{suffix}')
+        write_fastq(path, records)
+        paths.append(path)
+    return paths
+
+def _names(path):
+    return [record_name.split()[0].rsplit('/', 1)[0]
+            for record_name, in iter_fastq(path, columns=['seqname'])]
+
+def test_hash_sample_keeps_paired_fastq_in_sync(tmp_path):
+    for casava in (False, True):
+        r1_path, r2_path = _write_pair(tmp_path, 2000, casava)
+        outputs = {}
+        for seed in (0, 1):
+            out1 = str(tmp_path / f'out{seed}_R1.fastq')
+            out2 = str(tmp_path / f'out{seed}_R2.fastq.gz')
+            n1 = subsample.subsample_file(
+                r1_path, out1, 'fastq', fraction=0.3, seed=seed)
+            n2 = subsample.subsample_file(
+                r2_path, out2, 'fastq', fraction=0.3, seed=seed)
+
+            names1, names2 = _names(out1), _names(out2)
+            assert n1 == n2 == len(names1)
+            assert names1 == names2
+            assert 500 < n1 < 700
+            outputs[seed] = names1
+
+        # Mates are selected again by another seed
+        assert outputs[0] != outputs[1]
+
+def test_hash_sample_is_independent_of_order():
+    keys = [f'key{i}' for i in range(1000)]
+    sampled = list(subsample.hash_sample(keys, 0.5, seed=3))
+    reversed_sample = list(subsample.hash_sample(keys[::-1], 0.5, seed=3))
+    assert sampled == reversed_sample[::-1]
+    assert list(subsample.hash_sample(keys, 0)) == []
+    assert list(subsample.hash_sample(keys, 1)) == keys
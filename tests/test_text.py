@@ -0,0 +1,52 @@
+import mmap
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from nothingspecial import text
+
+def _is_mapped(array):
+    base = array
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return True
+        base = base.obj if isinstance(base, memoryview) \
+            else getattr(base, 'base', None)
+    return False
+
+def test_big_pickle_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    obj = {
+        'ints': np.arange(100000),
+        'floats': rng.random((300, 70)),
+        'small': np.arange(3),
+        'df': pd.DataFrame({'x': rng.random(5000), 'y': np.arange(5000)}),
+        'bytes': b'ACGT' * 5000,
+        'names': ['a', 'b'],
+    }
+    pickle_path = str(tmp_path / 'obj.pkl')
+    for max_bytes in (2 ** 31 - 1, 1000):
+        n_bytes = text.write_big_pickle(obj, pickle_path, max_bytes=max_bytes)
+        assert n_bytes == os.path.getsize(pickle_path)
+
+        loaded = text.read_big_pickle(pickle_path)
+        for key in ('ints', 'floats', 'small'):
+            np.testing.assert_array_equal(loaded[key], obj[key])
+        pd.testing.assert_frame_equal(loaded['df'], obj['df'])
+        assert loaded['bytes'] == obj['bytes']
+        assert loaded['names'] == obj['names']
+
+        # Large arrays are mapped from the file and writable (copy-on-write)
+        assert _is_mapped(loaded['ints']) and _is_mapped(loaded['floats'])
+        assert not _is_mapped(loaded['small'])
+        loaded['ints'][0] = -1
+        assert text.read_big_pickle(pickle_path)['ints'][0] == 0
+
+def test_read_big_pickle_plain_pickle(tmp_path):
+    pickle_path = str(tmp_path / 'plain.pkl')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump({'a': np.arange(10000)}, f)
+    loaded = text.read_big_pickle(pickle_path, max_bytes=100)
+    np.testing.assert_array_equal(loaded['a'], np.arange(10000))
@@ -1,8 +1,37 @@
 import os
-import sys
 import re
+import mmap
 import pickle
+import struct
+import numpy as np
 import pandas as pd
+from itertools import chain, islice
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .compression import open_input, open_output
+from .packedseq import PackedSeq
+from .linescan import LineScanner, COMMENT, DIVISOR, VALUES
+
+# Version of a file written by write_seq_store
+SEQ_STORE_VERSION = 1
+
+# Patterns of lines in a HASeq file
+_HASEQ_ITEMNUM = re.compile(r'\d+$')
+_HASEQ_SEQ = re.compile(r'[ATGC]')
+
+# Columns of a FASTQ record
+FASTQ_COLUMNS = ('seqname', 'seq', 'qualname', 'qual')
+
+# Big pickle files
+BIG_PICKLE_MAGIC = b'NSPKL5\0\0'
+_BIG_PICKLE_HEADER = struct.Struct('<QQQ')
+PICKLE_BUFFER_ALIGNMENT = 64
+PICKLE_MIN_BUFFER_BYTES = 2 ** 12
+
+# The number of records joined and written at once
+FASTQ_CHUNK_SIZE = 10000
+FASTA_CHUNK_SIZE = 1000
 
 def do_nothing(input_str: str) -> str:
     """Returns an input argument as it is. This can be used as a default value 
@@ -22,78 +51,229 @@ def write_1D_list_to_file(items, file_path):
 # =============== Old Functions =============== #
 # TODO: Review, renew and replace (if necessary) the old functions
 
-def parse_fasta(fasta_path):
-    '''Parse a FASTA file and return a dictionary'''
+def parse_fasta(fasta_path, packed=False):
+    '''Parse a FASTA file and return a dictionary. If packed is True, 
+    sequences are stored as packedseq.PackedSeq (2 bits per base).'''
     
     fasta = {}
     seq_name = ''
     tmp_seq = []
+    scanner = LineScanner(item_divisor='>', skip_empty_lines=False)
     
-    with open(fasta_path, 'r') as f:
-        for l in f:
-            if l.startswith('>'):
+    with open_input(fasta_path) as f:
+        for kind, data in scanner.scan(f):
+            if kind == DIVISOR:
                 if seq_name:
-                    fasta[seq_name] = ''.join(tmp_seq)
+                    fasta[seq_name] = _join_seq(tmp_seq, packed)
                     seq_name = ''
                     tmp_seq = []
-                seq_name = l[1:-1]
+                seq_name = scanner.decode(data)[1:]
                 
             else:
-                tmp_seq.append(l[:-1])
+                tmp_seq.append(scanner.join_values(data))
     if seq_name:
-        fasta[seq_name] = ''.join(tmp_seq)
+        fasta[seq_name] = _join_seq(tmp_seq, packed)
         
     return fasta
 
+def _join_seq(seq_lines, packed):
+    seq = ''.join(seq_lines)
+    if packed:
+        return PackedSeq.from_str(seq)
+    return seq
+
 def to_fasta(fasta, out_path):
     '''Save fasta object as a FASTA file'''
-    with open(out_path, 'w') as f:
-        for seq_name, seq in fasta.items():
-            print('>' + seq_name, file=f)
-            print(seq, file=f)
-
-def parse_fasta_in_dir(dir_path, filelist_name='0.filelist'):
-    '''Parse Fasta files in a given directory'''
-    flist = get_file_list(path=os.path.join(dir_path, filelist_name))
-    fasta_dict = {}
+    write_fasta(out_path, fasta.items())
+
+def write_fasta(out_path, records, itemnum=None, compression='infer'):
+    '''Writes (name, sequence) records to a FASTA file in chunks. 
+    Parameters
+    ----------
+        out_path: str
+            path to an output file. Compressed if it ends with '.gz' or '.zst'.
+        records: Iterable[Tuple[str, Union[str, PackedSeq]]]
+            pairs of a sequence name and a sequence.
+        itemnum: int
+            if given, an 'itemnum:' line is written first.
+        compression: str
+            see compression.open_output.
+    '''
+    with open_output(out_path, compression) as f:
+        if itemnum is not None:
+            f.write(f'itemnum: {itemnum}\n'.encode())
+        for chunk in _iter_chunks(records, FASTA_CHUNK_SIZE):
+            f.write(''.join(
+                f'>{name}\n{seq}\n' for name, seq in chunk).encode())
+
+def parse_fasta_in_dir(dir_path, filelist_name='0.filelist', workers=1,
+                       executor='process', lazy=False):
+    '''Parse Fasta files in a given directory
+    Parameters
+    ----------
+        dir_path: str
+            path to a directory containing FASTA files.
+        filelist_name: str
+            name of a file in dir_path listing FASTA file names (one name per 
+            line, optionally with an 'itemnum:' line).
+        workers: int
+            the number of workers parsing files in parallel.
+        executor: str
+            'process' or 'thread'. Kind of pool used if workers > 1.
+        lazy: bool
+            if True, returns LazyFastaDict that parses a file when its key is 
+            accessed for the first time. workers is not used in this case.
+    Return
+    ------
+        dict mapping file names to dictionaries returned by parse_fasta.
+    '''
+    flist = _read_file_list(os.path.join(dir_path, filelist_name))
+    paths = [os.path.join(dir_path, file_name) for file_name in flist]
+
+    if lazy:
+        return LazyFastaDict(dict(zip(flist, paths)))
+
+    if workers <= 1:
+        return {file_name: parse_fasta(fasta_path)
+                for file_name, fasta_path in zip(flist, paths)}
+
+    if executor == 'process':
+        pool_class = ProcessPoolExecutor
+    elif executor == 'thread':
+        pool_class = ThreadPoolExecutor
+    else:
+        raise ValueError(f'Unknown executor: {executor}')
+
+    # Send small files to a process in batches to reduce the overhead
+    chunksize = max(1, len(paths) // (workers * 4))
+    with pool_class(workers) as pool:
+        fastas = pool.map(parse_fasta, paths, chunksize=chunksize)
+        return dict(zip(flist, fastas))
+
+class LazyFastaDict(Mapping):
+    '''Mapping from file names to dictionaries of FASTA files. A file is 
+    parsed when its key is accessed for the first time.
+    '''
+    def __init__(self, paths):
+        self._paths = paths
+        self._fastas = {}
+
+    def __getitem__(self, file_name):
+        if file_name not in self._fastas:
+            self._fastas[file_name] = parse_fasta(self._paths[file_name])
+        return self._fastas[file_name]
+
+    def __contains__(self, file_name):
+        # Mapping.__contains__ would parse the file
+        return file_name in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+def _read_file_list(path):
+    '''Returns a list of file names written in a file. 'itemnum:' line and 
+    empty lines are skipped.
+    '''
+    flist = []
+    scanner = LineScanner(itemnum=True)
+
+    with open_input(path) as f:
+        for kind, data in scanner.scan(f):
+            if kind == VALUES:
+                flist.extend(line.rstrip() for line in scanner.split_values(data))
+
+    return flist
+
+def iter_fastq(fastq_path, batch_size=0, columns=FASTQ_COLUMNS):
+    '''Reads a FASTQ file record by record in constant memory.
+    Parameters
+    ----------
+        fastq_path: str
+            path to a FASTQ file (may be compressed).
+        batch_size: int
+            if 0, yields a tuple of selected columns for each record. 
+            Otherwise, yields DataFrame objects of at most batch_size records.
+        columns: Iterable[str]
+            columns to keep in the order given. Any of FASTQ_COLUMNS 
+            ('seqname', 'seq', 'qualname', 'qual').
     
-    for file_name in flist:
-        fasta_path = os.path.join(dir_path, file_name)
-        fasta = parse_fasta(fasta_path)
-        fasta_dict[file_name] = fasta
-        
-    return fasta_dict
+    Each record must have 4 lines: a name line starting with '@', a sequence 
+    line, a name line starting with '+' and a quality line of the same length 
+    as the sequence. ValueError is raised at the first record that does not 
+    follow this structure.
+    '''
+    columns = list(columns)
+    for column in columns:
+        if column not in FASTQ_COLUMNS:
+            raise ValueError(f'Unknown FASTQ column: {column}')
+    assert len(columns) > 0, 'No column is selected.'
+    indices = [FASTQ_COLUMNS.index(column) for column in columns]
+
+    scanner = LineScanner(skip_empty_lines=False)
+    # Lines of an incomplete record at the end of a block
+    rest = []
+    record_num = 0
+    batch = [[] for _ in indices]
+
+    with open_input(fastq_path) as f:
+        for _, data in scanner.scan(f):
+            lines = rest + scanner.split_values(data)
+            complete = len(lines) - len(lines) % 4
+            rest = lines[complete:]
+
+            fields = [lines[i:complete:4] for i in range(4)]
+            _check_fastq_records(fields, record_num, fastq_path)
+            record_num += complete // 4
+            selected = [fields[i] for i in indices]
+
+            if batch_size <= 0:
+                yield from zip(*selected)
+                continue
+
+            for values, new_values in zip(batch, selected):
+                values.extend(new_values)
+            while len(batch[0]) >= batch_size:
+                yield pd.DataFrame(
+                    {c: v[:batch_size] for c, v in zip(columns, batch)})
+                batch = [values[batch_size:] for values in batch]
+
+    # Empty lines are allowed only at the end of the file
+    if any(line != '' for line in rest):
+        raise ValueError(
+            f'{fastq_path}: the last record has {len(rest)} lines instead '
+            'of 4.')
+    if batch_size > 0 and len(batch[0]) > 0:
+        yield pd.DataFrame({c: v for c, v in zip(columns, batch)})
+
+def _check_fastq_records(fields, first_record, fastq_path):
+    '''Raises ValueError if a record of FASTQ lines is malformed. '''
+    for i, (name, seq, qualname, qual) in enumerate(zip(*fields)):
+        if name[:1] == '@' and qualname[:1] == '+' and len(seq) == len(qual):
+            continue
 
-def fastq_parser(fastq_path):
+        line_num = (first_record + i) * 4 + 1
+        if name[:1] != '@':
+            message = 'name line does not start with "@"'
+        elif qualname[:1] != '+':
+            message = 'third line does not start with "+"'
+        else:
+            message = 'lengths of sequence and quality are different'
+        raise ValueError(
+            f'{fastq_path}: record at line {line_num} is malformed '
+            f'({message}).')
+
+def fastq_parser(fastq_path, columns=FASTQ_COLUMNS):
     '''Returns a DataFrame(pandas) object.
     fastq_parser assumes that a sequence has 4 lines and there is no empty line.
+    Use iter_fastq for files that do not fit in memory.
     '''
-    name_list = []
-    seq_list = []
-    name2_list = []
-    qual_list = []
-    n = 1
-
-    with open(fastq_path, 'r') as f:
-        for l in f.readlines():
-            if n == 1:
-                name_list.append(l[:-1])
-                n += 1
-            elif n == 2:
-                seq_list.append(l[:-1])
-                n += 1
-            elif n == 3:
-                name2_list.append(l[:-1])
-                n += 1
-            elif n == 4:
-                qual_list.append(l[:-1])
-                n = 1
-    df = pd.DataFrame({'seqname': name_list,
-                       'seq': seq_list,
-                       'qualname': name2_list,
-                       'qual': qual_list})
+    df = pd.DataFrame(list(iter_fastq(fastq_path, columns=columns)),
+                      columns=list(columns))
     print('{0} items in {1}.'.format(len(df.index), fastq_path))
-    return df.ix[:, ['seqname', 'seq', 'qualname', 'qual']]
+    return df
 
 def to_fastq(fastq, file_name):
     '''
@@ -105,22 +285,33 @@ def to_fastq(fastq, file_name):
         file_name: str
             data will be written in this file.
     '''
-    fastq_lines = []
-    cnt = 0
-
-    for i, row in fastq.iterrows():
-        fastq_lines.append(row['seqname'])
-        fastq_lines.append(row['seq'])
-        fastq_lines.append(row['qualname'])
-        fastq_lines.append(row['qual'])
+    write_fastq(file_name, zip(*[fastq[column] for column in FASTQ_COLUMNS]))
 
-        cnt += 1
-        if cnt % 1000 == 0:
-            print('.', end='', flush=True)
+def write_fastq(out_path, records, compression='infer'):
+    '''Writes FASTQ records in chunks. 
+    Parameters
+    ----------
+        out_path: str
+            path to an output file. Compressed if it ends with '.gz' or '.zst'.
+        records: Iterable[Tuple[str, str, str, str]]
+            (seqname, seq, qualname, qual) of each record, such as records 
+            yielded by iter_fastq or zip of four columns.
+        compression: str
+            see compression.open_output.
+    '''
+    with open_output(out_path, compression) as f:
+        for chunk in _iter_chunks(records, FASTQ_CHUNK_SIZE):
+            lines = chain.from_iterable(chunk)
+            f.write(('\n'.join(lines) + '\n').encode())
 
-    with open(file_name, 'w') as f:
-        print('\n'.join(fastq_lines), file=f)
-        print(' Written in {}'.format(file_name))
+def _iter_chunks(items, size):
+    '''Yields lists of at most size items. '''
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if len(chunk) == 0:
+            return
+        yield chunk
 
 # NOTE: This function was moved into evogen_share.file_IO on 2024.5.21 by HY.
 # def to_filelist(dir_path):
@@ -180,27 +371,126 @@ def to_fastq(fastq, file_name):
 #     return flist
 
 def read_big_pickle(pickle_path, max_bytes=2**31-1):
+    '''Loads an object written by write_big_pickle. 
+    Parameters
+    ----------
+        pickle_path: str
+            path to a file written by write_big_pickle. A plain pickle file 
+            is also accepted.
+        max_bytes: int
+            the maximum number of bytes read at once from a plain pickle file.
+
+    Out-of-band buffers (e.g., data of NumPy arrays) are memory-mapped 
+    without copying. The mapping is copy-on-write, so loaded arrays are 
+    writable but changes are not saved in the file. 
+    '''
+    with open(pickle_path, 'rb') as f:
+        magic = f.read(len(BIG_PICKLE_MAGIC))
+        if magic != BIG_PICKLE_MAGIC:
+            f.seek(0)
+            return _read_plain_pickle(f, max_bytes)
+
+        data_size, buffer_num, table_offset = _BIG_PICKLE_HEADER.unpack(
+            f.read(_BIG_PICKLE_HEADER.size))
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size != table_offset + 8 * buffer_num:
+            raise ValueError(f'{pickle_path} is truncated or corrupted.')
+
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
 
-    bytes_in = bytearray(0)
-    input_size = os.path.getsize(pickle_path)
+    buffer_sizes = struct.unpack_from(f'<{buffer_num}Q', view, table_offset)
+    data_start = len(BIG_PICKLE_MAGIC) + _BIG_PICKLE_HEADER.size
+    offset = data_start + data_size
+    buffers = []
+    for size in buffer_sizes:
+        offset += -offset % PICKLE_BUFFER_ALIGNMENT
+        buffers.append(view[offset:offset + size])
+        offset += size
 
-    with open(pickle_path, 'rb') as f_in:
+    if offset != table_offset:
+        raise ValueError(f'{pickle_path} is corrupted.')
+    return pickle.loads(view[data_start:data_start + data_size],
+                        buffers=buffers)
 
-        for _ in range(0, input_size, max_bytes):
-            bytes_in += f_in.read(max_bytes)
+def write_big_pickle(obj, out_path, max_bytes=2**31-1):
+    '''Writes an object by pickle protocol 5 and returns the number of 
+    bytes written.
+    Parameters
+    ----------
+        obj: Any
+            picklable object.
+        out_path: str
+            path to an output file.
+        max_bytes: int
+            the maximum number of bytes written at once.
+
+    Buffers of at least PICKLE_MIN_BUFFER_BYTES (e.g., data of NumPy arrays 
+    and bytearray objects) are written out-of-band as segments aligned to 
+    PICKLE_BUFFER_ALIGNMENT, so that read_big_pickle can map them without 
+    copying. bytes objects are always written in the pickle data.
+
+    Format
+    ------
+    magic (8 bytes), pickle size, the number of buffers and the offset of 
+    the buffer size table (uint64 each), pickle data, buffers and the buffer 
+    size table (uint64 each).
+    '''
+    buffers = []
+
+    def keep_in_band(buffer):
+        # Small buffers are not worth their own segments
+        if buffer.raw().nbytes < PICKLE_MIN_BUFFER_BYTES:
+            return True
+        buffers.append(buffer)
+        return False
 
-    return pickle.loads(bytes_in)
+    with open(out_path, 'wb') as f:
+        # The header is written again when sizes are known
+        f.write(BIG_PICKLE_MAGIC + _BIG_PICKLE_HEADER.pack(0, 0, 0))
+        data_start = f.tell()
+        _BigPickler(f, protocol=5, buffer_callback=keep_in_band).dump(obj)
+        offset = f.tell()
+        data_size = offset - data_start
 
-def write_big_pickle(obj, out_path):
+        buffer_sizes = []
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % PICKLE_BUFFER_ALIGNMENT
+            f.write(b'\0' * padding)
+            for start in range(0, raw.nbytes, max_bytes):
+                f.write(raw[start:start + max_bytes])
+            offset += padding + raw.nbytes
+            buffer_sizes.append(raw.nbytes)
 
-    n_bytes = sys.getsizeof(obj)
-    max_bytes = 2**31 - 1
-    bytes_out = pickle.dumps(obj)
+        f.write(struct.pack(f'<{len(buffer_sizes)}Q', *buffer_sizes))
+        total_bytes = offset + 8 * len(buffer_sizes)
+        f.seek(len(BIG_PICKLE_MAGIC))
+        f.write(_BIG_PICKLE_HEADER.pack(data_size, len(buffer_sizes), offset))
 
-    with open(out_path, 'wb') as f_out:
+    written_bytes = os.path.getsize(out_path)
+    if written_bytes != total_bytes:
+        raise OSError(f'{written_bytes} bytes were written in {out_path} '
+                      f'instead of {total_bytes} bytes.')
+    return total_bytes
 
-        for idx in range(0, n_bytes, max_bytes):
-            f_out.write(bytes_out[idx:idx+max_bytes])
+class _BigPickler(pickle.Pickler):
+    '''Pickler that passes large bytearray objects to buffer_callback. '''
+    def reducer_override(self, obj):
+        if type(obj) is bytearray and len(obj) >= PICKLE_MIN_BUFFER_BYTES:
+            return bytearray, (pickle.PickleBuffer(obj),)
+        return NotImplemented
+
+def _read_plain_pickle(f, max_bytes):
+    '''Loads a plain pickle file into a buffer allocated at once. '''
+    data = bytearray(os.fstat(f.fileno()).st_size)
+    view = memoryview(data)
+    pos = 0
+    while pos < len(data):
+        n = f.readinto(view[pos:pos + max_bytes])
+        if n == 0:
+            break
+        pos += n
+    return pickle.loads(view[:pos])
 
 def pkg_version(pkg):
     import pkg_resources
@@ -214,36 +504,153 @@ def get_last_dir_name(path):
     else:
         return os.path.basename(path)
 
+class HASeqFormatError(ValueError):
+    '''Raised when a line of a HASeq file is malformed. '''
+    def __init__(self, path, line_num, gene_name, message):
+        super().__init__(
+            f'{path}, line {line_num} (gene: {gene_name or "-"}): {message}')
+        self.path = path
+        self.line_num = line_num
+        self.gene_name = gene_name
+
 def parse_HASeqFile(path):
-    item_cnt = 0
-    fasta_dict = {}
+    '''Parse a HASeq file and return a dictionary of CDS sequences. '''
+    return dict(iter_HASeqFile(path))
+
+def iter_HASeqFile(path):
+    '''Yields (gene name, CDS sequence) of a HASeq file one by one.
+
+    A gene starts with a '>' line, and its sequence line follows a 'cod' line 
+    giving the CDS length (e.g., 'cod:1203'). A terminal character of a 
+    sequence line (e.g., ';') is removed. HASeqFormatError is raised with the 
+    line number and the gene name if a 'cod' line cannot be read or the 
+    sequence length is different from the CDS length.
+    '''
     gene_name = ''
     cds_len = 0
+    line_num = 0
+    scanner = LineScanner(
+        comments=['/*'], item_divisor='>', skip_empty_lines=False)
 
-    with open(path, 'r') as f:
-        for line in f:
-            if re.match(r'\d+$', line[:-1]):
+    with open_input(path) as f:
+        for kind, data in scanner.scan(f):
+            if kind == COMMENT:
+                line_num += 1
                 continue
-            
-            if line.startswith('/*'):
+
+            if kind == DIVISOR:
+                line_num += 1
+                gene_name = scanner.decode(data)[1:]
                 continue
-            
-            if line.startswith('>'):
-                gene_name = line[1:-1]
-                
-            elif line.startswith('cod'):
-                cds_len = int(line[:-1].split(':')[1])
-                
-            elif gene_name != '' and cds_len > 0:
-                if re.match(r'[ATGC]', line):
-                    seq = line.rstrip()[:-1]
-                    assert cds_len == len(seq), gene_name
-                    
-                    fasta_dict[gene_name] = seq
-                    item_cnt += 1
+
+            for line in scanner.split_values(data):
+                line_num += 1
+                if _HASEQ_ITEMNUM.match(line):
+                    continue
+
+                if line.startswith('cod'):
+                    try:
+                        cds_len = int(line.split(':')[1])
+                    except (IndexError, ValueError):
+                        raise HASeqFormatError(
+                            path, line_num, gene_name,
+                            f'invalid CDS length line "{line}"') from None
+
+                elif gene_name != '' and cds_len > 0 \
+                        and _HASEQ_SEQ.match(line):
+                    seq = line.rstrip()
+                    if not seq[-1].isalpha():
+                        seq = seq[:-1]
+                    if len(seq) != cds_len:
+                        raise HASeqFormatError(
+                            path, line_num, gene_name,
+                            f'sequence length {len(seq)} is different from '
+                            f'CDS length {cds_len}')
+
+                    yield gene_name, seq
                     gene_name = ''
                     cds_len = 0
 
-    assert len(fasta_dict) == item_cnt, 'Incorrect item number'
-    return fasta_dict
-    
\ No newline at end of file
+def convert_HASeqFile(path, store_path):
+    '''Converts a HASeq file into a packed sequence store 
+    (see write_seq_store), which is loaded much faster by read_seq_store.
+    '''
+    return write_seq_store(iter_HASeqFile(path), store_path)
+
+def write_seq_store(seqs, store_path):
+    '''Writes sequences packed into 2 bits per base (packedseq.PackedSeq) 
+    as one file.
+    Parameters
+    ----------
+        seqs: Union[Mapping[str, str], Iterable[Tuple[str, str]]]
+            sequence names and sequences (str or PackedSeq).
+        store_path: str
+            path to an output file.
+
+    Packed data of all sequences are concatenated into a few arrays with 
+    offsets of each sequence, so the file is written and loaded by 
+    write_big_pickle and read_big_pickle without per-sequence objects.
+    '''
+    if isinstance(seqs, Mapping):
+        seqs = seqs.items()
+
+    names = []
+    lengths = []
+    packed = []
+    positions = []
+    chars = []
+    for name, seq in seqs:
+        if not isinstance(seq, PackedSeq):
+            seq = PackedSeq.from_str(seq)
+        names.append(name)
+        lengths.append(len(seq))
+        packed.append(seq.packed)
+        positions.append(seq.ambiguous_positions)
+        chars.append(seq.ambiguous_chars)
+
+    store = {
+        'version': SEQ_STORE_VERSION,
+        'names': names,
+        'lengths': np.array(lengths, dtype=np.int64),
+        'packed': _concatenate_arrays(packed, np.uint8),
+        'packed_offsets': _offsets(packed),
+        'ambiguous_positions': _concatenate_arrays(positions, np.int64),
+        'ambiguous_chars': _concatenate_arrays(chars, np.uint8),
+        'ambiguous_offsets': _offsets(positions),
+    }
+    return write_big_pickle(store, store_path)
+
+def read_seq_store(store_path):
+    '''Loads a file written by write_seq_store and returns a dictionary of 
+    PackedSeq. Packed data are memory-mapped and not copied.
+    '''
+    store = read_big_pickle(store_path)
+    assert store['version'] == SEQ_STORE_VERSION, \
+        f'Unsupported version of a sequence store: {store["version"]}'
+
+    packed = store['packed']
+    packed_offsets = store['packed_offsets'].tolist()
+    positions = store['ambiguous_positions']
+    chars = store['ambiguous_chars']
+    ambiguous_offsets = store['ambiguous_offsets'].tolist()
+
+    seqs = {}
+    for i, (name, length) in enumerate(
+            zip(store['names'], store['lengths'].tolist())):
+        a0, a1 = ambiguous_offsets[i], ambiguous_offsets[i + 1]
+        seqs[name] = PackedSeq(
+            packed[packed_offsets[i]:packed_offsets[i + 1]], length,
+            positions[a0:a1], chars[a0:a1])
+    return seqs
+
+def _concatenate_arrays(arrays, dtype):
+    '''Concatenates a list of NumPy arrays into one array of dtype. '''
+    if len(arrays) == 0:
+        return np.array([], dtype=dtype)
+    return np.concatenate(arrays).astype(dtype, copy=False)
+
+def _offsets(arrays):
+    '''Returns offsets of arrays in their concatenation (len(arrays) + 1). '''
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    return offsets